@@ -0,0 +1,147 @@
+import json
+import time as _time
+
+import matplotlib.pyplot as plt
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import Normalize
+
+import plot
+from windReader.colormap import colormap as cm
+from windReader.reader.qc import policy_from_config
+
+
+class TimeSeriesRenderer(object):
+    """Render consecutive passes over a fixed georange into one figure.
+
+    The figure, GeoAxes, colorbar, coastlines and gridlines are built once,
+    only the barbs artist and titles are swapped per frame.
+    """
+
+    def __init__(self, georange, proj_name="PlateCarree", proj_para=None,
+                 lonlat_step=2, plot_style=plot.DEFAULT_STYLE,
+                 barbs_renderer="matplotlib"):
+        self.georange = tuple(georange)
+        self.plot_style = plot_style
+        self.barbs_renderer = barbs_renderer
+        self.dpi = 1200 / plot.DEFAULT_WIDTH
+
+        self.fig, self.ax = plot.create_figure(
+            self.georange, proj_name, proj_para, plot_style
+        )
+        # colorbar is independent of the frames, use a standalone mappable
+        cmap, vmin, vmax = cm.get_colormap(plot_style["colormap"])
+        mappable = ScalarMappable(norm=Normalize(vmin=vmin, vmax=vmax), cmap=cmap)
+        plot.add_colorbar(self.ax, mappable)
+        plot.add_map_features(self.ax, lonlat_step, plot_style)
+
+        self._barbs = None
+        self._bbox = None
+
+    def update(self, reader):
+        """swap barbs and titles for the reader given"""
+        time = plot.get_valid_time(reader, self.georange)
+        lons, lats = reader.get_lonlats()
+        wind_speed, wind_dir = reader.get_values()
+        damax = plot.get_max_wind(wind_speed)
+        sat_title = reader.platform_name + " " + reader.resolution
+
+        if self._barbs is not None:
+            self._barbs.remove()
+        self._barbs = plot.plot_barbs(
+            self.ax, lons, lats, wind_speed, wind_dir, self.plot_style,
+            self.barbs_renderer
+        )
+        plot.set_titles(self.ax, sat_title, time, damax)
+
+    def save(self, save_file):
+        if self._bbox is None:
+            # fix the saved area at the first frame, so every frame has
+            # the same size and the tight bbox is not recomputed each time
+            renderer = self.fig.canvas.get_renderer()
+            self._bbox = self.fig.get_tightbbox(renderer).padded(0.03)
+        self.fig.savefig(save_file, dpi=self.dpi, bbox_inches=self._bbox)
+
+    def close(self):
+        plt.close(self.fig)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def save_animation(frame_files, save_file, duration=500):
+    """Combine PNG frames into an animated GIF/PNG"""
+    from PIL import Image
+    frames = [Image.open(f).convert("RGB") for f in frame_files]
+    frames[0].save(
+        save_file,
+        save_all=True,
+        append_images=frames[1:],
+        duration=duration,
+        loop=0,
+    )
+
+
+def main(config):
+    """read configs"""
+    # reader parameters
+    reader = config.get("reader", None)
+    route = config.get("source", None)
+    fnames = config.get("filenames", [])
+    band = config.get("wind_band", None)
+    crop_area = config.get("crop_area", False)
+    quality_control = policy_from_config(config)
+    georange = tuple(config.get("georange", (-90, 90, 0, 360)))
+    # plot parameters
+    proj_name = config.get("projection", "PlateCarree")
+    proj_para = config.get("projection_parameters", {"central_longitude": 0})
+    lonlat_step = config.get("lon_lat_step", 2)
+    barbs_renderer = config.get("barbs_renderer", "matplotlib")
+    # save parameters
+    spath = config.get("save_path", None)
+    sfname = config.get("save_filename", "frame_{index:03d}.png")
+    afname = config.get("animation_filename", None)
+    duration = config.get("frame_duration", 500)
+
+    if not fnames:
+        raise ValueError("No files given for animation.")
+
+    frame_files = []
+    with TimeSeriesRenderer(
+        georange, proj_name, proj_para, lonlat_step,
+        barbs_renderer=barbs_renderer
+    ) as renderer:
+        for index, fname in enumerate(fnames):
+            t0 = _time.perf_counter()
+            reader_ = plot.load_wind(
+                f"{route}/{fname}",
+                reader=reader,
+                band=band,
+                quality_control=quality_control,
+                crop_area=crop_area,
+                georange=georange,
+            )
+            t1 = _time.perf_counter()
+            renderer.update(reader_)
+            reader_.close()
+            save_file = f"{spath}/" + sfname.format(index=index, filename=fname)
+            renderer.save(save_file)
+            t2 = _time.perf_counter()
+            frame_files.append(save_file)
+            print(f"Frame {index}: load {t1 - t0:.2f}s, render {t2 - t1:.2f}s")
+
+    if afname:
+        save_animation(frame_files, f"{spath}/{afname}", duration=duration)
+
+
+# main codes
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='wind_animator')
+    parser.add_argument('-c','--config_path', default='config.json')
+    args = parser.parse_args()
+    with open(args.config_path, "r") as f:
+        config = json.load(f)
+    main(config)
@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import random
+import socket
+import threading
+import time as _time
+import uuid
+from multiprocessing import Process
+
+from windReader.reader import find_reader
+
+# a claim not refreshed for this long (s) belongs to a dead worker
+STALE_TIMEOUT = 600
+MAX_ATTEMPTS = 3
+
+
+def build_jobs(config):
+    """granule x region work list, skipping files no reader matches"""
+    route = config.get("source", None)
+    fnames = config.get("filenames", None)
+    regions = config.get("regions", [])
+    if not fnames:
+        fnames = sorted(
+            f for f in os.listdir(route) if os.path.isfile(f"{route}/{f}")
+        )
+    jobs = []
+    for fname in fnames:
+        if find_reader(f"{route}/{fname}", reader=config.get("reader", None)) is None:
+            print(f"{fname}: no reader matched, skipped.")
+            continue
+        for region in regions:
+            name = f"{os.path.splitext(fname)[0]}__{region['name']}"
+            jobs.append({
+                "id": hashlib.sha1(name.encode("utf-8")).hexdigest()[:16],
+                "filename": fname,
+                "region": region,
+            })
+    return jobs
+
+
+class JobDir(object):
+    """Shared directory coordinating workers on any number of hosts.
+
+    claims/<id>.lock  held by a running worker, created with O_EXCL and
+                      touched periodically as heartbeat, holds the owner
+                      and a token of the claim
+    done/<id>.json    completed job with timings, written by rename
+    failed/<id>.json  failed attempts of a job
+    """
+
+    def __init__(self, path, stale_timeout=STALE_TIMEOUT, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.stale_timeout = stale_timeout
+        self.max_attempts = max_attempts
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        # token of each claim held, a lock with another token is not ours
+        self._tokens = {}
+        for sub in ("claims", "done", "failed"):
+            os.makedirs(os.path.join(path, sub), exist_ok=True)
+
+    def _file(self, sub, job_id, ext):
+        return os.path.join(self.path, sub, job_id + ext)
+
+    def _write(self, path, data):
+        tmp = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp, path)
+
+    def _read_lock(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _is_stale(self, path):
+        return _time.time() - os.stat(path).st_mtime >= self.stale_timeout
+
+    def is_done(self, job_id):
+        return os.path.exists(self._file("done", job_id, ".json"))
+
+    def attempts(self, job_id):
+        try:
+            with open(self._file("failed", job_id, ".json")) as f:
+                return len(json.load(f))
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def owns(self, job_id):
+        lock = self._read_lock(self._file("claims", job_id, ".lock"))
+        return (
+            lock is not None
+            and job_id in self._tokens
+            and lock.get("token") == self._tokens[job_id]
+        )
+
+    def claim(self, job_id):
+        """Try to take the job, breaking a stale claim. `True` if taken."""
+        lock = self._file("claims", job_id, ".lock")
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if not self._is_stale(lock):
+                    return False
+            except FileNotFoundError:
+                return self.claim(job_id)
+            # only one worker wins the rename of a stale claim
+            stale = f"{lock}.stale.{socket.gethostname()}.{os.getpid()}"
+            try:
+                os.rename(lock, stale)
+            except FileNotFoundError:
+                return False
+            # another worker may have broken the claim and taken the job
+            # between our stat and rename, then we moved its fresh lock:
+            # put it back unless a newer one exists
+            if not self._is_stale(stale):
+                try:
+                    os.link(stale, lock)
+                except FileExistsError:
+                    pass
+                os.remove(stale)
+                return False
+            os.remove(stale)
+            print(f"Breaking stale claim of job {job_id}")
+            return self.claim(job_id)
+        token = uuid.uuid4().hex
+        with os.fdopen(fd, "w") as f:
+            json.dump({"owner": self.owner, "token": token, "time": _time.time()}, f)
+        self._tokens[job_id] = token
+        # finished by another worker, or failed too often, since listing
+        if self.is_done(job_id) or self.attempts(job_id) >= self.max_attempts:
+            self.release(job_id)
+            return False
+        return True
+
+    def heartbeat(self, job_id):
+        if not self.owns(job_id):
+            return
+        try:
+            os.utime(self._file("claims", job_id, ".lock"))
+        except FileNotFoundError:
+            pass
+
+    def release(self, job_id):
+        """Remove the claim if it is still ours, a claim broken as stale
+        may be held by another worker now"""
+        if self.owns(job_id):
+            try:
+                os.remove(self._file("claims", job_id, ".lock"))
+            except FileNotFoundError:
+                pass
+        self._tokens.pop(job_id, None)
+
+    def mark_done(self, job_id, record):
+        self._write(self._file("done", job_id, ".json"), record)
+
+    def mark_failed(self, job_id, record):
+        path = self._file("failed", job_id, ".json")
+        try:
+            with open(path) as f:
+                records = json.load(f)
+        except (FileNotFoundError, ValueError):
+            records = []
+        self._write(path, records + [record])
+
+    def manifest(self):
+        records = []
+        done = os.path.join(self.path, "done")
+        for fname in sorted(os.listdir(done)):
+            if fname.endswith(".json"):
+                with open(os.path.join(done, fname)) as f:
+                    records.append(json.load(f))
+        return records
+
+
+def run_job(config, job):
+    """Render one granule x region with `plot.main`, the output is written
+    to a temporary file and renamed, so it is either complete or absent"""
+    import plot
+    region = job["region"]
+    spath = config.get("save_path", ".")
+    sfname = config.get("save_filename", "{granule}_{region}.png").format(
+        granule=os.path.splitext(job["filename"])[0], region=region["name"]
+    )
+    root, ext = os.path.splitext(sfname)
+    tmp_name = f"{root}.{socket.gethostname()}.{os.getpid()}.tmp{ext}"
+    job_config = dict(config)
+    job_config.update({k: v for k, v in region.items() if k != "name"})
+    job_config.update(
+        filename=job["filename"], save_path=spath, save_filename=tmp_name
+    )
+    plot.main(job_config)
+    os.replace(f"{spath}/{tmp_name}", f"{spath}/{sfname}")
+    return f"{spath}/{sfname}"
+
+
+def _heartbeat(jobdir, job_id, stop):
+    while not stop.wait(jobdir.stale_timeout / 3):
+        jobdir.heartbeat(job_id)
+
+
+def worker(config, jobs):
+    """Claim and run jobs until none is left to take"""
+    jobdir = JobDir(
+        config.get("jobs_dir", "./batch_jobs"),
+        config.get("stale_timeout", STALE_TIMEOUT),
+        config.get("max_attempts", MAX_ATTEMPTS),
+    )
+    # different start points keep workers from contending for the same jobs
+    jobs = list(jobs)
+    random.Random(jobdir.owner).shuffle(jobs)
+
+    while True:
+        pending = [
+            job for job in jobs
+            if not jobdir.is_done(job["id"]) and jobdir.attempts(job["id"]) < jobdir.max_attempts
+        ]
+        if not pending:
+            return
+        ran = False
+        for job in pending:
+            if not jobdir.claim(job["id"]):
+                continue
+            ran = True
+            stop = threading.Event()
+            beat = threading.Thread(
+                target=_heartbeat, args=(jobdir, job["id"], stop), daemon=True
+            )
+            beat.start()
+            t0 = _time.time()
+            record = {
+                "job": job["id"],
+                "filename": job["filename"],
+                "region": job["region"]["name"],
+                "worker": jobdir.owner,
+                "start": t0,
+            }
+            try:
+                record["output"] = run_job(config, job)
+            except Exception as e:
+                record.update(end=_time.time(), error=repr(e))
+                jobdir.mark_failed(job["id"], record)
+                print(f"Job {job['id']} failed: {e!r}")
+            else:
+                record.update(end=_time.time(), seconds=_time.time() - t0)
+                jobdir.mark_done(job["id"], record)
+                print(f"Job {job['id']} done in {record['seconds']:.2f}s")
+            finally:
+                stop.set()
+                beat.join()
+                jobdir.release(job["id"])
+        if not ran:
+            # everything left is claimed by others, wait for them or for
+            # their claims to become stale
+            _time.sleep(min(jobdir.stale_timeout / 10, 30))
+
+
+def main(config, workers=1, manifest=None):
+    """read configs"""
+    jobs = build_jobs(config)
+    print(f"{len(jobs)} jobs")
+    procs = [Process(target=worker, args=(config, jobs)) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+
+    if manifest:
+        jobdir = JobDir(config.get("jobs_dir", "./batch_jobs"))
+        with open(manifest, "w") as f:
+            json.dump(jobdir.manifest(), f, indent=1)
+
+
+# main codes
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='wind_batch')
+    parser.add_argument('-c','--config_path', default='config.json')
+    parser.add_argument('-w','--workers', type=int, default=1)
+    parser.add_argument('-m','--manifest', default=None)
+    args = parser.parse_args()
+    with open(args.config_path, "r") as f:
+        config = json.load(f)
+    main(config, workers=args.workers, manifest=args.manifest)
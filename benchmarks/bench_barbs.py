@@ -0,0 +1,75 @@
+"""Benchmark vectorized barbs against `ax.barbs`.
+
+Usage: python -m benchmarks.bench_barbs [-n 1000 10000 50000]
+"""
+
+import time
+
+import numpy as np
+import matplotlib.pyplot as plt
+plt.switch_backend('agg')
+
+import cartopy.crs as ccrs
+from matplotlib.colors import Normalize
+
+from windReader.render.barbs import barbs
+from windReader.colormap import colormap as cm
+
+
+def synthetic_winds(n, seed=0):
+    rng = np.random.default_rng(seed)
+    lons = rng.uniform(100, 160, n)
+    lats = rng.uniform(-30, 30, n)
+    spd = rng.gamma(2., 10., n)
+    dirs = rng.uniform(0, 360, n)
+    u = spd * np.sin(np.deg2rad(dirs))
+    v = spd * np.cos(np.deg2rad(dirs))
+    return lons, lats, u, v, spd
+
+
+def render(n, vectorized, seed=0):
+    lons, lats, u, v, spd = synthetic_winds(n, seed)
+    cmap, vmin, vmax = cm.get_colormap("wind")
+    fig, ax = plt.subplots(
+        figsize=(5, 5), subplot_kw=dict(projection=ccrs.PlateCarree())
+    )
+    ax.set_extent([100, 160, -30, 30], crs=ccrs.PlateCarree())
+    kwargs = dict(
+        cmap=cmap,
+        norm=Normalize(vmin=vmin, vmax=vmax),
+        flip_barb=(lats <= 0),
+        pivot='middle',
+        length=3.5,
+        linewidth=0.25,
+        transform=ccrs.PlateCarree(),
+    )
+    t0 = time.perf_counter()
+    if vectorized:
+        barbs(ax, lons, lats, u, v, spd, **kwargs)
+    else:
+        ax.barbs(lons, lats, u, v, spd, **kwargs)
+    t1 = time.perf_counter()
+    fig.canvas.draw()
+    t2 = time.perf_counter()
+    img = np.asarray(fig.canvas.buffer_rgba()).copy()
+    plt.close(fig)
+    return t1 - t0, t2 - t1, img
+
+
+def main(sizes):
+    print(f"{'n':>8} {'mpl build':>10} {'mpl draw':>10} "
+          f"{'vec build':>10} {'vec draw':>10} {'diff px':>8}")
+    for n in sizes:
+        mb, md, mimg = render(n, False)
+        vb, vd, vimg = render(n, True)
+        diff = int(np.any(mimg != vimg, axis=-1).sum())
+        print(f"{n:>8} {mb:>10.3f} {md:>10.3f} {vb:>10.3f} {vd:>10.3f} {diff:>8}")
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='barbs_benchmark')
+    parser.add_argument('-n', '--sizes', nargs='+', type=int,
+                        default=[1000, 10000, 50000])
+    args = parser.parse_args()
+    main(args.sizes)
@@ -0,0 +1,478 @@
+"""Numerical and visual regression harness.
+
+Runs every reader on the example data and on synthetic fixtures derived
+from it, and renders the example configs with `plot.main`. `record`
+stores decoded fields, crop indices, nearest times and images as
+baselines, `check` compares a new run against them within tolerances and
+reports timings of both runs side by side.
+
+Baselines recorded from the working tree can not catch changes made
+before recording. `record --revision REV` runs the cases with the code of
+a git revision instead, checked out in a temporary worktree; the cases
+only use reader API that predates the harness. Intended changes since a
+revision are listed in expected_differences.json and reported without
+failing.
+
+benchmarks/reference is committed and holds the fixture cases recorded
+at 7f852e8, before the renderer, cache and reader changes the harness
+covers (`record -r 7f852e8 --no-granules --no-images -b
+benchmarks/reference`). Images depend on the local cartopy coastline
+data, so reference images are recorded locally from the same revision:
+
+    python -m benchmarks.regression check -b benchmarks/reference
+    python -m benchmarks.regression record -r 7f852e8
+    python -m benchmarks.regression check
+
+Usage: python -m benchmarks.regression {record,check} [-b BASELINE_DIR]
+           [-d DATA_DIR] [-r REVISION] [--no-images] [--no-granules]
+           [-k PATTERN]
+"""
+
+import argparse
+import json
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import matplotlib.image as mimage
+
+from windReader.reader import find_reader
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# written to baselines recorded at a git revision
+INFO_FILE = "baseline_info.json"
+# intended changes since a revision, {revision: {case: {field: reason}}},
+# reported without failing checks of baselines recorded at the revision
+EXPECTED_FILE = os.path.join(os.path.dirname(__file__), "expected_differences.json")
+# numeric tolerances of decoded fields
+RTOL = 1e-6
+ATOL = 1e-6
+# image tolerances: mean absolute difference (0-255) and changed pixels
+IMAGE_MEAN_DIFF = 0.5
+IMAGE_CHANGED_FRACTION = 1e-3
+# pixels of a variant checked against the plain config's image count as
+# changed above this difference (0-255). Positions of compact swaths are
+# float32 and move the antialiasing of edges by up to about 100 levels.
+IMAGE_EQUIVALENT_LEVELS = 128
+# rows kept in synthetic fixtures
+FIXTURE_ROWS = 64
+# variables with a synthetic wind field in the fixtures, by reader
+FIXTURE_WINDS = {
+    "ascat_nc": ("wind_speed", "wind_dir"),
+    "oscat_nc": ("wind_speed", "wind_dir"),
+    "cscat_nc": ("wind_speed_selection", "wind_dir_selection"),
+}
+
+
+def make_fixture(src, dst, reader_name):
+    """Small netCDF granule: first rows of `src` with a synthetic vortex
+    as wind field and one fully missing row"""
+    import netCDF4
+    with netCDF4.Dataset(src) as fin, netCDF4.Dataset(dst, "w") as fout:
+        fout.setncatts({k: fin.getncattr(k) for k in fin.ncattrs()})
+        speed_name, dir_name = FIXTURE_WINDS[reader_name]
+        row_dim = fin.variables[speed_name].dimensions[0]
+        for name, dim in fin.dimensions.items():
+            size = FIXTURE_ROWS if name == row_dim else len(dim)
+            fout.createDimension(name, size)
+        for name, var in fin.variables.items():
+            fill = var.getncattr("_FillValue") if "_FillValue" in var.ncattrs() else None
+            out = fout.createVariable(name, var.dtype, var.dimensions, fill_value=fill)
+            out.setncatts({k: var.getncattr(k) for k in var.ncattrs() if k != "_FillValue"})
+            index = tuple(
+                slice(0, FIXTURE_ROWS) if d == row_dim else slice(None)
+                for d in var.dimensions
+            )
+            data = var[index]
+            if name in (speed_name, dir_name) and data.ndim == 2:
+                rows, cols = np.indices(data.shape)
+                if name == speed_name:
+                    data = np.ma.array(
+                        5 + 30 * np.exp(-((rows - 32)**2 + (cols - data.shape[1] / 2)**2) / 200.),
+                        mask=np.ma.getmaskarray(data),
+                    )
+                else:
+                    data = np.ma.array(
+                        np.rad2deg(np.arctan2(rows - 32, cols - data.shape[1] / 2)) % 360,
+                        mask=np.ma.getmaskarray(data),
+                    )
+                data[10] = np.ma.masked
+            out[index] = data
+
+
+def build_cases(data_dir, work_dir, granules=True):
+    """Reader cases (path, reader name, band) for example data, unless
+    `granules` is False, and fixtures"""
+    cases = []
+    for fname in sorted(os.listdir(data_dir)):
+        path = os.path.abspath(os.path.join(data_dir, fname))
+        config = find_reader(path)
+        if config is None:
+            continue
+        bands = config["class"].WIND_DATASETS_ID or [None]
+        for band in bands if granules else ():
+            cases.append((os.path.splitext(fname)[0], path, config["name"], band))
+        if config["name"] in FIXTURE_WINDS:
+            fixture = os.path.join(work_dir, f"fixture_{fname}")
+            make_fixture(path, fixture, config["name"])
+            cases.append((f"fixture_{config['name']}", fixture, config["name"], None))
+    return cases
+
+
+def _valid_georange(lons, lats, spd):
+    """4x4 deg box around the max wind, for crop and nearest time"""
+    valid = ~np.ma.getmaskarray(spd)
+    if not valid.any():
+        return None
+    i = np.argmax(np.where(valid, np.ma.getdata(spd), -np.inf))
+    lat = float(np.ma.getdata(lats).flat[i])
+    lon = float(np.ma.getdata(lons).flat[i])
+    return (lat - 2, lat + 2, lon - 2, lon + 2)
+
+
+def _cell_times(times, shape):
+    """Cell times as int64 seconds, NaT for times that can not be read"""
+    times = np.asarray(times)
+    out = np.full(times.shape, np.datetime64("NaT"), dtype="datetime64[s]")
+    for i, t in np.ndenumerate(times):
+        try:
+            out[i] = np.datetime64(t, "s")
+        except (TypeError, ValueError):
+            pass
+    if out.shape != tuple(shape):
+        try:
+            out = np.broadcast_to(out.reshape(out.shape + (1,) * (len(shape) - out.ndim)), shape)
+        except ValueError:
+            # neither row nor cell times
+            out = np.full(shape, np.datetime64("NaT"), dtype="datetime64[s]")
+    return out.astype(np.int64)
+
+
+def run_reader_case(path, reader_name, band, qc):
+    """Decoded fields and scalars of one reader run, with timings. Only
+    reader API of every revision compared is used."""
+    t0 = time.perf_counter()
+    reader = find_reader(path, reader=reader_name)["class"](path)
+    if reader.WIND_DATASETS_ID:
+        reader.load(band, qc=qc)
+    else:
+        reader.load(qc=qc)
+    t1 = time.perf_counter()
+    lons, lats = reader.get_lonlats()
+    spd, wind_dir = reader.get_values()
+    arrays = {
+        "speed": spd, "u": wind_dir['v'], "v": wind_dir['h'],
+        "lat": lats, "lon": lons,
+    }
+    out = {}
+    for name, a in arrays.items():
+        out[name] = np.ma.getdata(a).astype(np.float64)
+        out[name + "_mask"] = np.ma.getmaskarray(a)
+    out["time"] = _cell_times(reader.wvc_time, np.shape(spd))
+    scalars = {"load_seconds": t1 - t0}
+
+    georange = _valid_georange(lons, lats, spd)
+    scalars["georange"] = georange
+    if georange is not None:
+        t2 = time.perf_counter()
+        nearest = reader.nearest_time(georange)
+        scalars["nearest_time"] = None if nearest is None else str(nearest)
+        try:
+            scalars["crop_indices"] = [int(i) for i in reader._get_indices(georange)]
+        except ValueError:
+            scalars["crop_indices"] = None
+        scalars["nearest_seconds"] = time.perf_counter() - t2
+    if hasattr(reader, "close"):
+        reader.close()
+    return out, scalars
+
+
+# render variants of each example config, and whether they are expected
+# to look like the plain config. Those are checked against the plain
+# config's image when they have no baseline of their own, as for
+# baselines recorded at revisions, which only hold the plain configs,
+# with the antialiasing tolerance IMAGE_EQUIVALENT_LEVELS.
+RENDER_VARIANTS = (
+    ("barbs_renderer", "vectorized", False),
+    ("compact", True, True),
+    ("render_mode", "raster", False),
+)
+
+
+def render_cases(root, revision=False):
+    """plot.main configs (name, config, equivalent case name or `None`)
+    of the examples present"""
+    cases = []
+    for fname in sorted(os.listdir(root)):
+        if not (fname.startswith("config_") and fname.endswith(".json")):
+            continue
+        with open(os.path.join(root, fname)) as f:
+            config = json.load(f)
+        config["source"] = os.path.abspath(os.path.join(root, config.get("source", ".")))
+        if not os.path.exists(f"{config['source']}/{config.get('filename')}"):
+            continue
+        name = fname[len("config_"):-len(".json")]
+        cases.append((name, config, None))
+        if revision:
+            continue
+        for key, value, equivalent in RENDER_VARIANTS:
+            cases.append((
+                f"{name}_{key}", dict(config, **{key: value}),
+                name if equivalent else None,
+            ))
+    return cases
+
+
+def run_render_case(config, save_dir, name):
+    import plot
+    config = dict(config, save_path=save_dir, save_filename=f"{name}.png")
+    t0 = time.perf_counter()
+    plot.main(config)
+    return os.path.join(save_dir, f"{name}.png"), time.perf_counter() - t0
+
+
+class Revision(object):
+    """Runs case functions of this harness with the code of a git
+    revision, checked out in a temporary worktree"""
+
+    SNIPPET = (
+        "import importlib.util, pickle, sys\n"
+        "spec = importlib.util.spec_from_file_location('regression', sys.argv[1])\n"
+        "module = importlib.util.module_from_spec(spec)\n"
+        "spec.loader.exec_module(module)\n"
+        "with open(sys.argv[3], 'rb') as f:\n"
+        "    args = pickle.load(f)\n"
+        "result = getattr(module, sys.argv[2])(*args)\n"
+        "with open(sys.argv[3], 'wb') as f:\n"
+        "    pickle.dump(result, f)\n"
+    )
+
+    def __init__(self, revision, work_dir):
+        self.revision = subprocess.run(
+            ["git", "rev-parse", "--verify", f"{revision}^{{commit}}"],
+            cwd=ROOT_DIR, check=True, capture_output=True, text=True,
+        ).stdout.strip()
+        self.tree = os.path.join(work_dir, "worktree")
+        subprocess.run(
+            ["git", "worktree", "add", "--detach", self.tree, self.revision],
+            cwd=ROOT_DIR, check=True, capture_output=True,
+        )
+
+    def run(self, func, *args):
+        call = os.path.join(os.path.dirname(self.tree), "call.pkl")
+        with open(call, "wb") as f:
+            pickle.dump(args, f)
+        subprocess.run(
+            [sys.executable, "-c", self.SNIPPET, os.path.abspath(__file__), func, call],
+            cwd=self.tree, check=True,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(
+                [self.tree] + [p for p in [os.environ.get("PYTHONPATH")] if p]
+            )),
+            stdout=subprocess.DEVNULL,
+        )
+        with open(call, "rb") as f:
+            return pickle.load(f)
+
+    def close(self):
+        subprocess.run(
+            ["git", "worktree", "remove", "--force", self.tree],
+            cwd=ROOT_DIR, check=False, capture_output=True,
+        )
+
+
+def compare_arrays(base, new):
+    """list of problems, empty if within tolerance"""
+    problems = []
+    for key in sorted(set(base) | set(new)):
+        if key not in base or key not in new:
+            problems.append(f"{key}: missing")
+            continue
+        a, b = base[key], new[key]
+        if a.shape != b.shape:
+            problems.append(f"{key}: shape {a.shape} != {b.shape}")
+        elif a.dtype == bool or key == "time":
+            n = int((a != b).sum())
+            if n:
+                problems.append(f"{key}: {n} cells differ")
+        else:
+            both = np.isfinite(a) & np.isfinite(b)
+            if not np.array_equal(np.isfinite(a), np.isfinite(b)):
+                problems.append(f"{key}: non-finite cells differ")
+            elif not np.allclose(a[both], b[both], rtol=RTOL, atol=ATOL):
+                diff = np.abs(a[both] - b[both]).max()
+                problems.append(f"{key}: max abs diff {diff:.3g}")
+    return problems
+
+
+def compare_scalars(base, new):
+    # same types as the baseline read back from JSON
+    new = json.loads(json.dumps(new))
+    return [
+        f"{key}: {base.get(key)!r} != {new.get(key)!r}"
+        for key in ("georange", "crop_indices", "nearest_time")
+        if base.get(key) != new.get(key)
+    ]
+
+
+def compare_images(base_file, new_file, levels=0):
+    a = mimage.imread(base_file)
+    b = mimage.imread(new_file)
+    if a.shape != b.shape:
+        return [f"image: shape {a.shape} != {b.shape}"], None
+    diff = np.abs(a.astype(np.float64) - b.astype(np.float64)) * 255
+    mean = diff.mean()
+    changed = (diff.max(axis=-1) > levels).mean()
+    problems = []
+    if mean > IMAGE_MEAN_DIFF or changed > IMAGE_CHANGED_FRACTION:
+        problems.append(f"image: mean diff {mean:.3f}, changed {changed:.2%}")
+    return problems, (mean, changed)
+
+
+def _ratio(base, new):
+    return f"{base:7.3f}s -> {new:7.3f}s ({base / new if new else float('inf'):5.2f}x)"
+
+
+def _run(revision, func, *args):
+    """Case function run with the code of the revision if given. `None`
+    if it fails at the revision, e.g. for readers it does not have."""
+    if revision is None:
+        return globals()[func](*args)
+    try:
+        return revision.run(func, *args)
+    except subprocess.CalledProcessError:
+        return None
+
+
+def _report(case, what, base_seconds, seconds, problems, expected):
+    """Print the result of a case, `True` if it failed"""
+    expected = expected.get(case, {})
+    known = [p for p in problems if p.split(":")[0] in expected]
+    problems = [p for p in problems if p not in known]
+    status = "FAIL" if problems else "expected" if known else "ok"
+    print(f"{status:8s} {case:60s} {what} " + _ratio(base_seconds, seconds))
+    for problem in problems:
+        print(f"         {problem}")
+    for problem in known:
+        print(f"         {problem} ({expected[problem.split(':')[0]]})")
+    return bool(problems)
+
+
+def main(mode, baseline_dir=BASELINE_DIR, data_dir="example_data",
+         images=True, pattern=None, revision=None, granules=True):
+    record = mode == "record"
+    os.makedirs(baseline_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix="windreader_regression_")
+    info_file = os.path.join(baseline_dir, INFO_FILE)
+    if record:
+        if revision is not None:
+            revision = Revision(revision, work_dir)
+        with open(info_file, "w") as f:
+            json.dump({"revision": revision and revision.revision}, f)
+    elif revision is not None:
+        raise ValueError("A revision is only used to record baselines.")
+    try:
+        with open(info_file) as f:
+            base_revision = json.load(f)["revision"]
+    except FileNotFoundError:
+        base_revision = None
+    with open(EXPECTED_FILE) as f:
+        expected = json.load(f).get(base_revision, {}) if base_revision else {}
+    failures = 0
+    try:
+        for name, path, reader_name, band in build_cases(data_dir, work_dir, granules):
+            for qc in (True, False):
+                case = f"{name}{'_' + band if band else ''}_{'qc' if qc else 'noqc'}"
+                if pattern and pattern not in case:
+                    continue
+                npz = os.path.join(baseline_dir, case + ".npz")
+                meta = os.path.join(baseline_dir, case + ".json")
+                if record:
+                    result = _run(revision, "run_reader_case", path, reader_name, band, qc)
+                    if result is None:
+                        print(f"skipped  {case:60s} fails at {revision.revision[:10]}")
+                        continue
+                    arrays, scalars = result
+                    np.savez_compressed(npz, **arrays)
+                    with open(meta, "w") as f:
+                        json.dump(scalars, f, indent=1)
+                    print(f"recorded {case:60s} load {scalars['load_seconds']:.3f}s")
+                    continue
+                if not os.path.exists(npz):
+                    # baselines of a revision lack cases it could not run
+                    if base_revision is None:
+                        failures += 1
+                    print(f"{'MISSING' if base_revision is None else 'skipped':8s} {case}")
+                    continue
+                arrays, scalars = run_reader_case(path, reader_name, band, qc)
+                with np.load(npz) as data:
+                    base = dict(data)
+                with open(meta) as f:
+                    base_scalars = json.load(f)
+                problems = compare_arrays(base, arrays) + compare_scalars(base_scalars, scalars)
+                failures += _report(
+                    case, "load", base_scalars["load_seconds"], scalars["load_seconds"],
+                    problems, expected,
+                )
+
+        if images:
+            for name, config, equivalent in render_cases(ROOT_DIR, revision is not None):
+                case = f"render_{name}"
+                if pattern and pattern not in case:
+                    continue
+                png = os.path.join(baseline_dir, case + ".png")
+                meta = os.path.join(baseline_dir, case + ".json")
+                levels = 0
+                if not record and equivalent and not os.path.exists(png):
+                    png = os.path.join(baseline_dir, f"render_{equivalent}.png")
+                    meta = os.path.join(baseline_dir, f"render_{equivalent}.json")
+                    levels = IMAGE_EQUIVALENT_LEVELS
+                if record:
+                    result = _run(revision, "run_render_case", config, work_dir, case)
+                    if result is None:
+                        print(f"skipped  {case:60s} fails at {revision.revision[:10]}")
+                        continue
+                    new_file, seconds = result
+                    shutil.copy(new_file, png)
+                    with open(meta, "w") as f:
+                        json.dump({"render_seconds": seconds}, f)
+                    print(f"recorded {case:60s} render {seconds:.3f}s")
+                    continue
+                if not os.path.exists(png):
+                    if base_revision is None:
+                        failures += 1
+                    print(f"{'MISSING' if base_revision is None else 'skipped':8s} {case}")
+                    continue
+                new_file, seconds = run_render_case(config, work_dir, case)
+                with open(meta) as f:
+                    base_seconds = json.load(f)["render_seconds"]
+                problems, _ = compare_images(png, new_file, levels)
+                failures += _report(case, "render", base_seconds, seconds, problems, expected)
+    finally:
+        if isinstance(revision, Revision):
+            revision.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    if not record:
+        print(f"{failures} case(s) failed")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="wind_regression")
+    parser.add_argument("mode", choices=("record", "check"))
+    parser.add_argument("-b", "--baseline_dir", default=BASELINE_DIR)
+    parser.add_argument("-d", "--data_dir", default="example_data")
+    parser.add_argument("-r", "--revision", default=None)
+    parser.add_argument("--no-images", dest="images", action="store_false")
+    parser.add_argument("--no-granules", dest="granules", action="store_false")
+    parser.add_argument("-k", "--pattern", default=None)
+    args = parser.parse_args()
+    sys.exit(1 if main(
+        args.mode, args.baseline_dir, args.data_dir, args.images, args.pattern,
+        args.revision, args.granules,
+    ) else 0)
@@ -1,4 +1,5 @@
 import json
+from functools import partial
 
 import numpy as np
 from datetime import datetime
@@ -14,10 +15,36 @@ import cartopy.crs as ccrs
 import cartopy.feature as cfeature
 from cartopy.mpl.ticker import LongitudeFormatter, LatitudeFormatter
 
-from windReader.reader import find_reader
+from windReader.reader import load_reader
+from windReader.reader.qc import policy_from_config
 from windReader.colormap import colormap as cm
+from windReader.render import render_preview
+from windReader.render.barbs import barbs as fast_barbs
 
 DEFAULT_WIDTH = 5
+# approximate length of a barb staff in pixels of the saved figure
+BARB_PIXELS = 20
+# config keys without effect on raster previews, which are always drawn
+# from all cells on a plain lon/lat grid
+RASTER_IGNORED_KEYS = ("compact", "projection", "projection_parameters")
+
+# normal style
+DEFAULT_STYLE = {
+    'axes_facecolor': '#FFFFFF',
+    'colormap': 'wind',
+    'barbs_alpha': 1.,
+    'coastline_color': 'k',
+    'gridlines_color': 'k'
+}
+
+# for overlaying infrared imagery
+# DEFAULT_STYLE = {
+#     'axes_facecolor': '#333333',
+#     'colormap': 'wind_fnmoc',
+#     'barbs_alpha': 0.7,
+#     'coastline_color': 'k',
+#     'gridlines_color': 'w'
+# }
 
 def calc_figsize(georange):
     latmin, latmax, lonmin, lonmax = georange
@@ -26,43 +53,33 @@ def calc_figsize(georange):
     return figsize
 
 
-def main(config):
-    """read configs"""
-    # reader parameters
-    reader = config.get("reader", None)
-    route = config.get("source", None)
-    fname = config.get("filename", None)
-    band = config.get("wind_band", None)
-    crop_area = config.get("crop_area", False)
-    quality_control = config.get("use_quality_control", True)
-    georange = tuple(config.get("georange", (-90, 90, 0, 360)))
-    # plot parameters
-    proj_name = config.get("projection", "PlateCarree")
-    proj_para = config.get("projection_parameters", {"central_longitude": 0})
-    lonlat_step = config.get("lon_lat_step", 2)
-    # save parameters
-    spath = config.get("save_path", None)
-    sfname = config.get("save_filename", None)
-
-    """search reader"""
-    reader = "auto" if not reader else reader
-
-    load_file = f"{route}/{fname}"
-    reader_config = find_reader(load_file, reader=reader)
-
-    if reader_config is None:
-        raise ValueError("No reader matched for this file.")
+def calc_output_resolution(georange, width, render_mode="barbs"):
+    """km covered by one barb (or one pixel for rasters) across the figure"""
+    latmin, latmax, lonmin, lonmax = georange
+    km_per_pixel = (
+        (lonmax - lonmin) * 111.2 * np.cos(np.deg2rad((latmin + latmax) / 2))
+        / width
+    )
+    if render_mode == "barbs":
+        return km_per_pixel * BARB_PIXELS
+    return km_per_pixel
 
-    reader_name = reader_config['name']
-    reader_class = reader_config['class']
 
-    """load wind data"""
-    reader = reader_class(load_file)
+def load_wind(load_file, reader="auto", band=None, quality_control=True,
+              crop_area=False, georange=(-90, 90, 0, 360), pyramid_dir=None,
+              resolution_km=None, time_window=None):
+    """search reader and load wind data"""
+    reader = "auto" if not reader else reader
 
-    if reader.WIND_DATASETS_ID:
-        reader.load(band, qc=quality_control)
-    else:
-        reader.load(qc=quality_control)
+    reader = load_reader(
+        load_file,
+        reader=reader,
+        band=band,
+        qc=quality_control,
+        pyramid_dir=pyramid_dir,
+        resolution_km=resolution_km,
+        time_window=time_window,
+    )
 
     # add 360 deg for longitude that lower than 0
     reader.longitude[reader.longitude < 0] += 360
@@ -70,6 +87,10 @@ def main(config):
     if crop_area:
         reader.crop(georange)
 
+    return reader
+
+
+def get_valid_time(reader, georange):
     time = reader.nearest_time(georange)
     if not time:
         print(
@@ -77,54 +98,29 @@ def main(config):
             "will try to use start time."
         )
         time = reader.start_time
+    return time
 
-    resolution = reader.resolution # ends with KM
 
-    lons, lats = reader.get_lonlats()
-    wind_speed, wind_dir = reader.get_values()
-    wind_dir_v, wind_dir_h = wind_dir['v'], wind_dir['h']
-
-    """get max wind"""
-    # get max wind in given area
+def get_max_wind(wind_speed):
+    """get max wind in given area, `None` for empty data"""
     if len(wind_speed) == 0 or isinstance(wind_speed.max(), np.ma.core.MaskedConstant):
         print("Empty data for given area.")
-    else:
-        damax = "%.01f" % wind_speed.max()
+        return None
+    return "%.01f" % wind_speed.max()
 
-    """get satellite info"""
-    # transfroming resolution string
-    sat_title = reader.platform_name + " " + resolution
 
-    """plot data to figure"""
-    print("...PLOTING...")
+def create_figure(georange, proj_name="PlateCarree", proj_para=None,
+                  plot_style=DEFAULT_STYLE):
+    """Create figure and axis with all static (data independent) artists
+    except the colorbar"""
+    proj_para = {"central_longitude": 0} if proj_para is None else proj_para
 
-    # set figure-dpi
-    dpi = 1200 / DEFAULT_WIDTH
-    
     # set figsize
     figsize = calc_figsize(georange)
 
     # set projection
     proj = getattr(ccrs, proj_name)
 
-    # normal style
-    plot_style = {
-        'axes_facecolor': '#FFFFFF',
-        'colormap': 'wind',
-        'barbs_alpha': 1.,
-        'coastline_color': 'k',
-        'gridlines_color': 'k'
-    }
-
-    # for overlaying infrared imagery
-    # plot_style = {
-    #     'axes_facecolor': '#333333',
-    #     'colormap': 'wind_fnmoc',
-    #     'barbs_alpha': 0.7,
-    #     'coastline_color': 'k',
-    #     'gridlines_color': 'w'
-    # }
-
     # set figure and axis
     fig, ax = plt.subplots(figsize=figsize, subplot_kw=dict(projection=proj(**proj_para)))
     ax.patch.set_facecolor(plot_style["axes_facecolor"])
@@ -137,14 +133,20 @@ def main(config):
     latmin, latmax, lonmin, lonmax = georange
     ax.set_extent([lonmin, lonmax, latmin, latmax], crs=ccrs.PlateCarree())
 
-    # plot brabs
+    return fig, ax
+
+
+def plot_barbs(ax, lons, lats, wind_speed, wind_dir, plot_style=DEFAULT_STYLE,
+               renderer="matplotlib"):
     cmap, vmin, vmax = cm.get_colormap(plot_style["colormap"])
     nh = lats > 0
-    bb = ax.barbs(
+    # "vectorized" builds all barbs with batched numpy operations
+    barbs = partial(fast_barbs, ax) if renderer == "vectorized" else ax.barbs
+    bb = barbs(
         lons,
         lats,
-        wind_dir_v,
-        wind_dir_h,
+        wind_dir['v'],
+        wind_dir['h'],
         wind_speed,
         cmap=cmap,
         norm=Normalize(vmin=vmin, vmax=vmax),
@@ -155,10 +157,12 @@ def main(config):
         alpha=plot_style["barbs_alpha"],
         transform=ccrs.PlateCarree(),
     )
+    return bb
 
-    # plot colorbar
+
+def add_colorbar(ax, mappable):
     cb = plt.colorbar(
-        bb,
+        mappable,
         ax=ax,
         orientation='vertical',
         pad=0.01,
@@ -172,7 +176,10 @@ def main(config):
     cb.outline.set_linewidth(0.3)
     cb.set_alpha(1)
     cb.draw_all()
+    return cb
 
+
+def add_map_features(ax, lonlat_step=2, plot_style=DEFAULT_STYLE):
     # add coastlines
     ax.add_feature(
         cfeature.COASTLINE.with_scale("10m"),
@@ -207,7 +214,10 @@ def main(config):
     gl.ypadding = 2.5
     gl.xlabel_style = {'size': 3.5, 'color': 'k', 'ha': 'center'}
     gl.ylabel_style = {'size': 3.5, 'color': 'k', 'va': 'center'}
+    return gl
+
 
+def set_titles(ax, sat_title, time, damax=None):
     # add title at the left top of figure
     text = f'{sat_title} Wind (barbs) [kt]'
     text += f' (Generated by @Shuitai)\n'
@@ -215,11 +225,115 @@ def main(config):
     ax.set_title(text, loc='left', fontsize=5)
 
     # add max wind title at the right top of figure
-    try:
-        text = f'Max. Wind: {damax}kt'
-        ax.set_title(text, loc='right', fontsize=4)
-    except NameError:
-        pass
+    text = f'Max. Wind: {damax}kt' if damax is not None else ''
+    ax.set_title(text, loc='right', fontsize=4)
+
+
+def main(config):
+    """read configs"""
+    # reader parameters
+    reader = config.get("reader", None)
+    route = config.get("source", None)
+    fname = config.get("filename", None)
+    band = config.get("wind_band", None)
+    crop_area = config.get("crop_area", False)
+    quality_control = policy_from_config(config)
+    georange = tuple(config.get("georange", (-90, 90, 0, 360)))
+    # ("YYYY-mm-ddTHH:MM:SS", "YYYY-mm-ddTHH:MM:SS") to read only rows within
+    time_window = config.get("time_window", None)
+    # plot parameters
+    proj_name = config.get("projection", "PlateCarree")
+    proj_para = config.get("projection_parameters", {"central_longitude": 0})
+    lonlat_step = config.get("lon_lat_step", 2)
+    # "barbs" or "raster" for fast previews, rasters ignore the keys in
+    # RASTER_IGNORED_KEYS
+    render_mode = config.get("render_mode", "barbs")
+    arrow_spacing = config.get("arrow_spacing", None)
+    barbs_renderer = config.get("barbs_renderer", "matplotlib")
+    # directory of cached multi-resolution pyramids, `None` to disable
+    pyramid_dir = config.get("pyramid_dir", None)
+    # plot only the valid cells as flat arrays
+    compact = config.get("compact", False)
+    # overrides of DEFAULT_STYLE entries
+    style = config.get("style", {})
+    # save parameters
+    spath = config.get("save_path", None)
+    sfname = config.get("save_filename", None)
+
+    if render_mode == "raster":
+        ignored = [key for key in RASTER_IGNORED_KEYS if key in config]
+        if ignored:
+            print(f"Raster previews ignore {', '.join(ignored)}.")
+
+    # set figure-dpi
+    dpi = 1200 / DEFAULT_WIDTH
+
+    """load wind data"""
+    reader = load_wind(
+        f"{route}/{fname}",
+        reader=reader,
+        band=band,
+        quality_control=quality_control,
+        crop_area=crop_area,
+        georange=georange,
+        pyramid_dir=pyramid_dir,
+        resolution_km=calc_output_resolution(
+            georange, DEFAULT_WIDTH * dpi, render_mode
+        ),
+        time_window=time_window,
+    )
+
+    with reader:
+        time = get_valid_time(reader, georange)
+
+        resolution = reader.resolution # ends with KM
+
+        if compact:
+            cells = reader.compact()
+            lons, lats = cells.get_lonlats()
+            wind_speed, wind_dir = cells.get_values()
+        else:
+            lons, lats = reader.get_lonlats()
+            wind_speed, wind_dir = reader.get_values()
+
+        """get max wind"""
+        damax = get_max_wind(wind_speed)
+
+        """get satellite info"""
+        # transfroming resolution string
+        sat_title = reader.platform_name + " " + resolution
+
+        plot_style = dict(DEFAULT_STYLE, **style)
+
+        if render_mode == "raster":
+            """rasterize data to image"""
+            print("...RASTERIZING...")
+            render_preview(
+                reader,
+                georange,
+                f"{spath}/{sfname}",
+                width=int(DEFAULT_WIDTH * dpi),
+                colormap=plot_style["colormap"],
+                arrow_spacing=arrow_spacing,
+            )
+            return
+
+    """plot data to figure"""
+    print("...PLOTING...")
+
+    fig, ax = create_figure(georange, proj_name, proj_para, plot_style)
+
+    # plot brabs
+    bb = plot_barbs(ax, lons, lats, wind_speed, wind_dir, plot_style, barbs_renderer)
+
+    # plot colorbar
+    add_colorbar(ax, bb)
+
+    # add coastlines and gridlines
+    add_map_features(ax, lonlat_step, plot_style)
+
+    # add titles
+    set_titles(ax, sat_title, time, damax)
 
     # save figure
     fig.savefig(
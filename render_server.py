@@ -0,0 +1,289 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qsl
+
+import plot
+from windReader.colormap import colormap as cm
+from windReader.reader.qc import policy_from_config
+from windReader.reader.utils import granule_key
+from windReader.render.cache import ImageCache, content_key
+
+# plot.main config keys a request may set, anything else is rejected
+RENDER_KEYS = (
+    "reader", "filename", "wind_band", "crop_area", "use_quality_control",
+    "qc_policy", "georange", "time_window", "projection",
+    "projection_parameters", "lon_lat_step", "render_mode", "arrow_spacing",
+    "barbs_renderer", "compact", "style",
+)
+# keys given as comma separated lists in query strings
+LIST_KEYS = ("georange", "time_window")
+# cartopy projections a request may use
+PROJECTIONS = (
+    "PlateCarree", "Mercator", "Miller", "LambertCylindrical",
+    "LambertConformal", "AlbersEqualArea", "Orthographic", "Robinson",
+    "Mollweide", "Stereographic", "NorthPolarStereo", "SouthPolarStereo",
+)
+MEMORY_ITEMS = 256
+# renders queued or running before new ones are refused
+MAX_PENDING = 64
+RENDER_TIMEOUT = 300
+
+
+class GranuleNotFoundError(Exception):
+    """The granule requested is not in the source directory"""
+
+
+def _render(config):
+    """Run `plot.main` in a worker process, returns the PNG bytes"""
+    tmp_dir = tempfile.mkdtemp(prefix="windreader_render_")
+    try:
+        plot.main(dict(config, save_path=tmp_dir, save_filename="render.png"))
+        with open(os.path.join(tmp_dir, "render.png"), "rb") as f:
+            return f.read()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+class MemoryCache(object):
+    """LRU of the most recently served images"""
+
+    def __init__(self, max_items=MEMORY_ITEMS):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._items[key] = data
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+
+class RenderService(object):
+    """Renders plot configs with a bounded process pool.
+
+    Images are cached in memory (LRU) and on disk under the hash of the
+    render parameters and the granule identity, so a changed file is
+    rendered again. Concurrent requests with the same key wait for a
+    single render.
+    """
+
+    def __init__(self, defaults, cache_dir="./render_cache", workers=None,
+                 memory_items=MEMORY_ITEMS, max_pending=MAX_PENDING):
+        self.defaults = {k: v for k, v in defaults.items() if k in RENDER_KEYS}
+        self.source = defaults.get("source", ".")
+        self.memory = MemoryCache(memory_items)
+        self.disk = ImageCache(cache_dir)
+        self.max_pending = max_pending
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self._pending = {}
+        # reentrant: a render done before its callback is added finishes
+        # in the calling thread, which holds the lock
+        self._lock = threading.RLock()
+
+    def request_config(self, params):
+        """plot.main config of a request, `ValueError` if not valid"""
+        unknown = set(params) - set(RENDER_KEYS)
+        if unknown:
+            raise ValueError(f"Parameters not supported: {', '.join(sorted(unknown))}.")
+        config = dict(self.defaults, **params)
+        fname = config.get("filename", None)
+        # only granules in the source directory are served
+        if not fname or os.path.basename(fname) != fname or fname.startswith("."):
+            raise ValueError(f"Filename {fname!r} not valid.")
+        if not os.path.isfile(os.path.join(self.source, fname)):
+            raise GranuleNotFoundError(f"{fname} not found.")
+        if "georange" in config:
+            georange = [float(v) for v in config["georange"]]
+            if len(georange) != 4:
+                raise ValueError("georange needs latmin, latmax, lonmin, lonmax.")
+            config["georange"] = georange
+        projection = config.get("projection", "PlateCarree")
+        if projection not in PROJECTIONS:
+            raise ValueError(
+                f"Projection {projection!r} not supported, available: {', '.join(PROJECTIONS)}."
+            )
+        if not isinstance(config.get("projection_parameters", {}), dict):
+            raise ValueError("projection_parameters must be an object.")
+        style = config.get("style", {})
+        if not isinstance(style, dict) or set(style) - set(plot.DEFAULT_STYLE):
+            raise ValueError(
+                f"style must be an object with keys of: {', '.join(plot.DEFAULT_STYLE)}."
+            )
+        colormaps = cm.available_colormaps()
+        if style.get("colormap", plot.DEFAULT_STYLE["colormap"]) not in colormaps:
+            raise ValueError(
+                f"Colormap {style['colormap']!r} not found, available: {', '.join(colormaps)}."
+            )
+        config["source"] = self.source
+        return config
+
+    def key(self, config):
+        granule = granule_key(
+            os.path.join(self.source, config["filename"]),
+            band=config.get("wind_band", None),
+            qc=policy_from_config(config),
+        )
+        return content_key({"granule": granule, "config": config})
+
+    def render(self, params, timeout=RENDER_TIMEOUT):
+        """PNG bytes of a request and where they came from: "memory",
+        "disk", "render" or "coalesced" (waited for an identical render)"""
+        config = self.request_config(params)
+        key = self.key(config)
+        data = self.memory.get(key)
+        if data is not None:
+            return data, "memory"
+        data = self.disk.get(key)
+        if data is not None:
+            self.memory.put(key, data)
+            return data, "disk"
+
+        with self._lock:
+            future = self._pending.get(key)
+            source = "coalesced"
+            if future is None:
+                if len(self._pending) >= self.max_pending:
+                    raise OverflowError("Too many renders pending.")
+                future = self.executor.submit(_render, config)
+                self._pending[key] = future
+                future.add_done_callback(lambda f: self._finish(key, f))
+                source = "render"
+        return future.result(timeout=timeout), source
+
+    def _finish(self, key, future):
+        # cache before dropping the pending entry, so a request arriving in
+        # between finds the image instead of starting another render
+        if future.exception() is None:
+            data = future.result()
+            self.disk.put(key, data)
+            self.memory.put(key, data)
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_query(query):
+    """Request parameters from a query string, values are read as JSON
+    when possible (numbers, booleans, objects) and lists as comma
+    separated values"""
+    params = {}
+    for name, value in parse_qsl(query, keep_blank_values=True):
+        if name in LIST_KEYS and not value.startswith("["):
+            params[name] = value.split(",")
+            continue
+        try:
+            params[name] = json.loads(value)
+        except ValueError:
+            params[name] = value
+    return params
+
+
+def make_handler(service):
+    """Request handler rendering GET /render.png?<params> or POST
+    /render.png with a JSON config body"""
+
+    class RenderHandler(BaseHTTPRequestHandler):
+
+        def _serve(self, params):
+            t0 = time.perf_counter()
+            try:
+                data, source = service.render(params)
+            except GranuleNotFoundError as e:
+                self.send_error(404, str(e))
+                return
+            except (ValueError, TypeError) as e:
+                self.send_error(400, str(e))
+                return
+            except OverflowError as e:
+                self.send_error(503, str(e))
+                return
+            except Exception as e:
+                self.send_error(500, repr(e))
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("X-Render-Cache", source)
+            self.send_header("X-Render-Seconds", f"{time.perf_counter() - t0:.3f}")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/render.png":
+                self.send_error(404)
+                return
+            self._serve(parse_query(url.query))
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/render.png":
+                self.send_error(404)
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                params = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError as e:
+                self.send_error(400, str(e))
+                return
+            if not isinstance(params, dict):
+                self.send_error(400, "Body must be a JSON object.")
+                return
+            self._serve(params)
+
+    return RenderHandler
+
+
+def main(config):
+    """read configs"""
+    # default render parameters, requests override them
+    port = config.get("port", 8001)
+    cache_dir = config.get("cache_dir", "./render_cache")
+    workers = config.get("workers", None)
+    memory_items = config.get("memory_items", MEMORY_ITEMS)
+    max_pending = config.get("max_pending", MAX_PENDING)
+
+    service = RenderService(
+        config,
+        cache_dir=cache_dir,
+        workers=workers,
+        memory_items=memory_items,
+        max_pending=max_pending,
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(service))
+    print(f"Serving renders at http://127.0.0.1:{port}/render.png")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+    finally:
+        service.close()
+
+
+# main codes
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='wind_render_server')
+    parser.add_argument('-c','--config_path', default='config.json')
+    args = parser.parse_args()
+    with open(args.config_path, "r") as f:
+        config = json.load(f)
+    main(config)
@@ -0,0 +1,141 @@
+import csv
+import json
+import os
+import time as _time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from windReader.reader import load_reader
+from windReader.reader.qc import policy_from_config
+
+OUTPUT_FIELDS = (
+    "index", "lat", "lon", "time", "filename",
+    "speed", "u", "v", "cell_time", "distance",
+)
+
+
+def read_observations(fname):
+    """lat, lon and time (ISO 8601, optional) columns of a CSV file.
+    Observations without a time are matched by distance only."""
+    lats, lons, times = [], [], []
+    with open(fname, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            lats.append(float(row["lat"]))
+            lons.append(float(row["lon"]))
+            times.append(row.get("time") or "NaT")
+    return (
+        np.asarray(lats),
+        np.asarray(lons),
+        np.asarray(times, dtype="datetime64[s]"),
+    )
+
+
+_worker_obs = None
+
+
+def _init_worker(obs):
+    global _worker_obs
+    _worker_obs = obs
+
+
+def _sample_granule(args):
+    """Sample one granule at the observations within its time span"""
+    fname, reader, band, qc, params = args
+    lats, lons, times = _worker_obs
+    try:
+        reader_ = load_reader(fname, reader=reader, band=band, qc=qc)
+    except ValueError as e:
+        print(f"{fname}:", e)
+        return fname, None, None
+    with reader_:
+        index = np.arange(len(lats))
+        max_time = params.get("max_time", None)
+        if max_time is not None and reader_.start_time and reader_.end_time:
+            window = np.timedelta64(int(max_time * 60), "s")
+            start = np.datetime64(reader_.start_time, "s") - window
+            end = np.datetime64(reader_.end_time, "s") + window
+            index = index[np.isnat(times) | ((times >= start) & (times <= end))]
+        if not len(index):
+            return fname, index, None
+        result = reader_.sample_points(
+            lats[index], lons[index], times[index], **params
+        )
+    found = np.isfinite(result["speed"])
+    return fname, index[found], {k: a[found] for k, a in result.items()}
+
+
+def write_samples(fname, obs, results):
+    lats, lons, times = obs
+    with open(fname, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(OUTPUT_FIELDS)
+        for granule, index, result in results:
+            if result is None:
+                continue
+            for i, j in enumerate(index):
+                writer.writerow([
+                    j, lats[j], lons[j], times[j], os.path.basename(granule),
+                    f"{result['speed'][i]:.2f}",
+                    f"{result['u'][i]:.2f}",
+                    f"{result['v'][i]:.2f}",
+                    result["time"][i],
+                    f"{result['distance'][i]:.2f}",
+                ])
+
+
+def main(config):
+    """read configs"""
+    # reader parameters
+    reader = config.get("reader", None)
+    route = config.get("source", None)
+    fnames = config.get("filenames", None)
+    band = config.get("wind_band", None)
+    quality_control = policy_from_config(config)
+    # sampling parameters
+    obs_file = config.get("observations", None)
+    params = {
+        "method": config.get("method", "nearest"),
+        "max_distance": config.get("max_distance", 50.),
+        "max_time": config.get("max_time", 30.),
+    }
+    workers = config.get("workers", None)
+    # save parameters
+    out_file = config.get("output", "samples.csv")
+
+    if not fnames:
+        fnames = sorted(
+            f for f in os.listdir(route) if os.path.isfile(f"{route}/{f}")
+        )
+    obs = read_observations(obs_file)
+    jobs = [
+        (f"{route}/{fname}", reader, band, quality_control, params)
+        for fname in fnames
+    ]
+
+    t0 = _time.perf_counter()
+    if workers == 1:
+        _init_worker(obs)
+        results = list(map(_sample_granule, jobs))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(obs,)
+        ) as executor:
+            results = list(executor.map(_sample_granule, jobs))
+    write_samples(out_file, obs, results)
+    count = sum(len(index) for _, index, result in results if result is not None)
+    print(
+        f"Sampled {count} of {len(obs[0])} observations in {len(jobs)} "
+        f"granules in {_time.perf_counter() - t0:.2f}s"
+    )
+
+
+# main codes
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='wind_sampler')
+    parser.add_argument('-c','--config_path', default='config.json')
+    args = parser.parse_args()
+    with open(args.config_path, "r") as f:
+        config = json.load(f)
+    main(config)
@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+import pytest
+
+from windReader.reader.compact import CompactSwath
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "example_data")
+
+
+@pytest.fixture
+def ascat_file():
+    fname = os.path.join(
+        EXAMPLE_DIR, "ascat_20210822_001500_metopc_14477_eps_o_250_3203_ovw.l2.nc"
+    )
+    if not os.path.exists(fname):
+        pytest.skip("ASCAT example data not available")
+    return fname
+
+
+class SwathReader(object):
+    """Loaded reader stand-in with a swath on a regular lat/lon grid"""
+
+    def __init__(self, lats, lons, speed, u, v, times):
+        self.latitude = np.ma.array(lats)
+        self.longitude = np.ma.array(lons)
+        self.wind_spd = np.ma.array(speed)
+        self.wind_dir = {'v': np.ma.array(u), 'h': np.ma.array(v)}
+        self.wvc_time = times
+        self._offset = (0, 0)
+
+    def get_lonlats(self):
+        return self.longitude, self.latitude
+
+    def get_values(self):
+        return self.wind_spd, self.wind_dir
+
+    def compact(self):
+        return CompactSwath.from_reader(self)
+
+
+@pytest.fixture
+def make_swath():
+    """Factory of `SwathReader` from lat and lon axes (degrees). Wind
+    fields are scalars or arrays of the grid shape, rows are observed
+    row_step seconds apart from start."""
+    def make(lat_axis, lon_axis, speed=10., u=0., v=1.,
+             start="2021-08-22T00:00:00", row_step=60):
+        lats, lons = np.meshgrid(lat_axis, lon_axis, indexing="ij")
+        times = np.datetime64(start, "s") + np.arange(len(lat_axis)) * np.timedelta64(row_step, "s")
+        speed, u, v = (
+            np.broadcast_to(np.asarray(a, dtype=np.float64), lats.shape).copy()
+            for a in (speed, u, v)
+        )
+        return SwathReader(lats, lons, speed, u, v, times)
+    return make
@@ -0,0 +1,96 @@
+import os
+import time
+
+import pytest
+
+import batch
+from batch import JobDir
+
+
+def _age(jobdir, job_id, seconds):
+    lock = jobdir._file("claims", job_id, ".lock")
+    past = time.time() - seconds
+    os.utime(lock, (past, past))
+
+
+@pytest.fixture
+def jobs_dir(tmp_path):
+    return str(tmp_path / "jobs")
+
+
+def test_claim_is_exclusive(jobs_dir):
+    a, b = JobDir(jobs_dir), JobDir(jobs_dir)
+    assert a.claim("job")
+    assert not b.claim("job")
+    assert a.owns("job") and not b.owns("job")
+    a.release("job")
+    assert b.claim("job")
+
+
+def test_stale_claim_is_broken(jobs_dir):
+    a, b = JobDir(jobs_dir, stale_timeout=60), JobDir(jobs_dir, stale_timeout=60)
+    assert a.claim("job")
+    _age(a, "job", 120)
+    assert b.claim("job")
+    assert b.owns("job") and not a.owns("job")
+
+
+def test_release_keeps_lock_of_new_owner(jobs_dir):
+    a, b = JobDir(jobs_dir, stale_timeout=60), JobDir(jobs_dir, stale_timeout=60)
+    assert a.claim("job")
+    _age(a, "job", 120)
+    assert b.claim("job")
+    # the worker whose claim was broken finishes late
+    a.release("job")
+    a.heartbeat("job")
+    assert os.path.exists(b._file("claims", "job", ".lock"))
+    assert b.owns("job")
+
+
+def test_fresh_lock_moved_by_racing_breaker_is_restored(jobs_dir, monkeypatch):
+    a = JobDir(jobs_dir, stale_timeout=60)
+    b = JobDir(jobs_dir, stale_timeout=60)
+    c = JobDir(jobs_dir, stale_timeout=60)
+    assert a.claim("job")
+    _age(a, "job", 120)
+
+    is_stale = JobDir._is_stale
+    calls = []
+
+    def racing_is_stale(self, path):
+        stale = is_stale(self, path)
+        if self is b and not calls:
+            calls.append(path)
+            # c breaks the stale claim and takes the job between b's stat
+            # and b's rename
+            assert c.claim("job")
+        return stale
+
+    monkeypatch.setattr(JobDir, "_is_stale", racing_is_stale)
+    assert not b.claim("job")
+    assert c.owns("job")
+    assert os.listdir(os.path.join(jobs_dir, "claims")) == ["job.lock"]
+
+
+def test_claim_rechecks_done_and_attempts(jobs_dir):
+    jobdir = JobDir(jobs_dir, max_attempts=2)
+    for _ in range(2):
+        jobdir.mark_failed("failing", {"error": "boom"})
+    assert not jobdir.claim("failing")
+    jobdir.mark_done("finished", {})
+    assert not jobdir.claim("finished")
+    assert os.listdir(os.path.join(jobs_dir, "claims")) == []
+
+
+def test_worker_respects_max_attempts(jobs_dir, monkeypatch):
+    def run_job(config, job):
+        raise RuntimeError("render failed")
+
+    monkeypatch.setattr(batch, "run_job", run_job)
+    jobs = [{"id": "job", "filename": "granule.nc", "region": {"name": "r"}}]
+    config = {"jobs_dir": jobs_dir, "max_attempts": 3}
+    batch.worker(config, jobs)
+    jobdir = JobDir(jobs_dir)
+    assert jobdir.attempts("job") == 3
+    assert not jobdir.is_done("job")
+    assert os.listdir(os.path.join(jobs_dir, "claims")) == []
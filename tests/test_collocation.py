@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from windReader.analysis.collocation import collocate
+from windReader.analysis.geo import EARTH_RADIUS_KM
+
+# 0.1 degree cells, about 11 km apart
+LATS = np.arange(20, 21, 0.1)
+LONS = np.arange(130, 131, 0.1)
+
+
+@pytest.fixture
+def swath(make_swath):
+    speed = np.arange(len(LATS) * len(LONS), dtype=np.float64).reshape(len(LATS), len(LONS))
+    return make_swath(LATS, LONS, speed=speed)
+
+
+def test_self_collocation(swath):
+    result = collocate(swath, swath, max_distance=25.)
+    cells = len(LATS) * len(LONS)
+    # of the cells within 25 km, only the cell itself is kept
+    assert len(result["distance"]) == cells
+    assert len(np.unique(result["row_a"] * 100 + result["col_a"])) == cells
+    np.testing.assert_array_equal(result["row_a"], result["row_b"])
+    np.testing.assert_array_equal(result["col_a"], result["col_b"])
+    np.testing.assert_allclose(result["distance"], 0, atol=1e-3)
+    assert np.all(result["time_diff"] == 0) and np.all(result["speed_diff"] == 0)
+
+
+def test_all_pairs_without_nearest(swath):
+    result = collocate(swath, swath, max_distance=12., nearest=False)
+    # the cell itself and its 2-4 neighbours along rows and columns
+    rows, cols = len(LATS), len(LONS)
+    neighbours = 2 * (rows - 1) * cols + 2 * rows * (cols - 1)
+    assert len(result["distance"]) == rows * cols + neighbours
+
+
+def test_known_offset(make_swath):
+    a = make_swath(LATS, LONS)
+    b = make_swath(LATS + 0.02, LONS, start="2021-08-22T00:10:00")
+    result = collocate(a, b, max_distance=10., max_time=30.)
+    assert len(result["distance"]) == len(LATS) * len(LONS)
+    np.testing.assert_allclose(
+        result["distance"], EARTH_RADIUS_KM * np.deg2rad(0.02), rtol=1e-4
+    )
+    np.testing.assert_array_equal(result["time_diff"], 600.)
+    np.testing.assert_array_equal(result["row_a"], result["row_b"])
+
+
+def test_max_time_excludes_passes(make_swath):
+    a = make_swath(LATS, LONS)
+    b = make_swath(LATS, LONS, start="2021-08-22T02:00:00")
+    result = collocate(a, b, max_time=30.)
+    assert len(result["distance"]) == 0
+    assert result["time_a"].dtype == np.dtype("datetime64[s]")
+    assert len(collocate(a, b, max_time=None)["distance"]) == len(LATS) * len(LONS)
+
+
+def test_direction_difference_wraps(make_swath):
+    def swath(direction):
+        rad = np.deg2rad(direction)
+        return make_swath(LATS, LONS, u=np.sin(rad), v=np.cos(rad))
+
+    result = collocate(swath(350.), swath(10.))
+    np.testing.assert_allclose(result["dir_a"], 350., atol=1e-3)
+    np.testing.assert_allclose(result["dir_b"], 10., atol=1e-3)
+    np.testing.assert_allclose(result["dir_diff"], 20., atol=1e-3)
+    np.testing.assert_allclose(collocate(swath(10.), swath(350.))["dir_diff"], -20., atol=1e-3)
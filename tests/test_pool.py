@@ -0,0 +1,96 @@
+import os
+
+import h5py
+import pytest
+
+from windReader.reader.ascat_l2 import ASCAT
+from windReader.reader.pool import HandlePool, open_dataset, set_handle_pool
+
+
+@pytest.fixture
+def files(tmp_path):
+    names = []
+    for i in range(3):
+        fname = str(tmp_path / f"granule_{i}.h5")
+        with h5py.File(fname, "w") as f:
+            f["data"] = [i]
+        names.append(fname)
+    return names
+
+
+def _is_open(handle):
+    return bool(handle.id.valid)
+
+
+def test_readers_share_handle(ascat_file):
+    pool = HandlePool()
+    set_handle_pool(pool)
+    try:
+        a, b = ASCAT(ascat_file), ASCAT(ascat_file)
+    finally:
+        set_handle_pool(None)
+    handle = a._datasets
+    assert b._datasets is handle and len(pool) == 1
+    a.close()
+    b.load(qc=False)
+    b.close()
+    # released handles stay open for the next reader
+    assert len(pool) == 1 and handle.isopen()
+    pool.clear()
+    assert len(pool) == 0 and not handle.isopen()
+
+
+def test_handles_in_use_are_not_evicted(files):
+    pool = HandlePool(maxsize=2)
+    handles = [pool.acquire(fname) for fname in files]
+    assert len(pool) == 3 and all(_is_open(h) for h in handles)
+    pool.release(handles[1])
+    # the released handle is the only one that can go
+    assert len(pool) == 2
+    assert not _is_open(handles[1])
+    assert _is_open(handles[0]) and _is_open(handles[2])
+
+
+def test_least_recently_used_is_evicted(files):
+    pool = HandlePool(maxsize=2)
+    first, second = pool.acquire(files[0]), pool.acquire(files[1])
+    pool.release(first)
+    pool.release(second)
+    # using the first file again makes the second the oldest
+    assert pool.acquire(files[0]) is first
+    pool.release(first)
+    third = pool.acquire(files[2])
+    assert len(pool) == 2
+    assert _is_open(first) and _is_open(third) and not _is_open(second)
+
+
+def test_modified_file_gets_new_handle(files):
+    pool = HandlePool()
+    old = pool.acquire(files[0])
+    stat = os.stat(files[0])
+    os.utime(files[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    new = pool.acquire(files[0])
+    assert new is not old and len(pool) == 1
+    # the outdated handle stays open until its reader is done
+    assert _is_open(old) and old["data"][0] == 0
+    pool.release(old)
+    assert not _is_open(old) and _is_open(new)
+    assert pool.acquire(files[0]) is new
+
+
+def test_clear_keeps_handles_in_use(files):
+    pool = HandlePool()
+    used, released = pool.acquire(files[0]), pool.acquire(files[1])
+    pool.release(released)
+    pool.clear()
+    assert len(pool) == 1
+    assert _is_open(used) and not _is_open(released)
+    pool.release(used)
+    pool.clear()
+    assert len(pool) == 0 and not _is_open(used)
+
+
+def test_release_of_unmanaged_handle_closes_it(files):
+    handle = open_dataset(files[0])
+    HandlePool().release(handle)
+    assert not _is_open(handle)
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from windReader.reader.pyramid import SwathPyramid
+
+
+class FakeReader(object):
+    """Loaded reader stand-in with a 32x16 swath at 12.5 km"""
+
+    resolution = "12.5 KM"
+
+    def __init__(self, rows=32, cols=16):
+        lats, lons = np.meshgrid(
+            np.linspace(10, 20, rows), np.linspace(120, 125, cols), indexing="ij"
+        )
+        self.latitude = np.ma.array(lats)
+        self.longitude = np.ma.array(lons)
+        self.wind_spd = np.ma.array(np.arange(rows * cols, dtype=np.float64).reshape(rows, cols))
+        self.wind_dir = {'v': np.ma.ones((rows, cols)), 'h': np.ma.zeros((rows, cols))}
+        self.wvc_time = np.full((rows, cols), np.datetime64("2021-08-22T00:15:00", "s"))
+
+    def get_lonlats(self):
+        return self.longitude, self.latitude
+
+    def get_values(self):
+        return self.wind_spd, self.wind_dir
+
+
+@pytest.fixture
+def pyramid():
+    return SwathPyramid.from_reader(FakeReader())
+
+
+def test_levels_halve_shape(pyramid):
+    shapes = [level["wind_spd"].shape for level in pyramid.levels]
+    # stops before a level gets fewer than MIN_LEVEL_SIZE columns
+    assert shapes == [(32, 16), (16, 8), (8, 4)]
+    assert pyramid.native_km == 12.5
+
+
+def test_coarse_level_keeps_block_max(pyramid):
+    spd = pyramid.levels[1]["wind_spd"]
+    native = pyramid.levels[0]["wind_spd"]
+    assert spd[0, 0] == native[:2, :2].max()
+    np.testing.assert_allclose(pyramid.levels[1]["u"], 1.)
+
+
+@pytest.mark.parametrize("resolution_km, level", [
+    (None, 0),
+    (0, 0),
+    (5., 0),
+    (12.5, 0),
+    (24.9, 0),
+    (25., 1),
+    (49., 1),
+    (50., 2),
+    (1000., 2),
+])
+def test_choose_level(pyramid, resolution_km, level):
+    assert pyramid.choose_level(resolution_km) == level
+
+
+def test_save_and_open(pyramid, tmp_path):
+    key = {"path": "granule.nc", "band": None}
+    pyramid.save(str(tmp_path), key)
+    stored = SwathPyramid.open(str(tmp_path), key)
+    assert stored.levels == [None, None, None]
+    assert stored.choose_level(30.) == 1
+    level = stored.load_level(1)
+    np.testing.assert_array_equal(level["wind_spd"], pyramid.levels[1]["wind_spd"])
+    assert SwathPyramid.open(str(tmp_path), {"path": "other.nc"}) is None
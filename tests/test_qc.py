@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from windReader.reader.ascat_l2 import ASCAT
+from windReader.reader.qc import QCPolicy, bitmask, policy_from_config, resolve_policy
+
+POLICIES = {
+    "default": QCPolicy("default", check=bitmask(0, 1, 2)),
+    "strict": QCPolicy("strict", check=bitmask(0, 1, 2, 3)),
+}
+
+
+def test_bitmask():
+    assert bitmask() == 0
+    assert bitmask(0, 3) == 0b1001
+
+
+def test_policy_mask():
+    policy = QCPolicy("p", check=bitmask(1, 2), allowed=bitmask(2))
+    flags = np.array([0, 1, 2, 4, 6])
+    np.testing.assert_array_equal(policy.mask(flags), [False, False, True, False, True])
+
+
+@pytest.mark.parametrize("qc, name", [
+    (True, "default"),
+    ("strict", "strict"),
+    ({"name": "custom", "check": [0, 4], "allowed": 1}, "custom"),
+    (POLICIES["strict"], "strict"),
+])
+def test_resolve_policy(qc, name):
+    assert resolve_policy(POLICIES, qc).name == name
+
+
+def test_resolve_policy_disabled_and_unknown():
+    assert resolve_policy(POLICIES, False) is None
+    assert resolve_policy(POLICIES, None) is None
+    with pytest.raises(ValueError):
+        resolve_policy(POLICIES, "missing")
+
+
+def test_policy_dict_round_trip():
+    policy = QCPolicy.from_dict({"name": "custom", "check": [0, 4], "allowed": [4]})
+    assert policy.check == 0b10001 and policy.allowed == 0b10000
+    assert QCPolicy.from_dict(policy.to_dict()) == policy
+
+
+@pytest.mark.parametrize("config, qc", [
+    ({}, True),
+    ({"use_quality_control": False}, False),
+    ({"use_quality_control": False, "qc_policy": "strict"}, False),
+    ({"qc_policy": "strict"}, "strict"),
+    ({"use_quality_control": True, "qc_policy": None}, True),
+])
+def test_policy_from_config(config, qc):
+    assert policy_from_config(config) == qc
+
+
+@pytest.fixture
+def reader(ascat_file):
+    with ASCAT(ascat_file) as reader:
+        yield reader
+
+
+def test_set_qc_policy_matches_load(reader):
+    reader.load(qc=False)
+    raw = reader.wind_spd
+    reader.load(qc=True)
+    masked = np.ma.getmaskarray(reader.wind_spd).copy()
+    reader.set_qc_policy(False)
+    np.testing.assert_array_equal(np.ma.getmaskarray(reader.wind_spd), np.ma.getmaskarray(raw))
+    assert reader.qc_policy is None
+    reader.set_qc_policy(True)
+    np.testing.assert_array_equal(np.ma.getmaskarray(reader.wind_spd), masked)
+    assert reader.qc_policy.name == "default"
+
+
+def test_set_qc_policy_after_reload_without_qc(reader):
+    reader.load(qc=True)
+    reader.load(qc=False)
+    assert reader._qc_flag is None and reader._qc_raw is None
+    assert reader.qc_policy is None
+    with pytest.raises(ValueError):
+        reader.set_qc_policy(True)
+
+
+def test_set_qc_policy_after_windowed_reload(reader):
+    reader.load(qc=True)
+    times = reader._row_times()
+    reader.load(qc=True, time_window=(str(times[100]), str(times[199])))
+    reader.set_qc_policy(False)
+    # flags and data of the second load, not the first
+    assert reader.wind_spd.shape == reader.latitude.shape
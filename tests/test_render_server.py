@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import render_server
+from render_server import GranuleNotFoundError, MemoryCache, RenderService, parse_query
+
+
+@pytest.fixture
+def service(ascat_file, tmp_path, monkeypatch):
+    service = RenderService(
+        {"source": os.path.dirname(ascat_file), "filename": os.path.basename(ascat_file)},
+        cache_dir=str(tmp_path / "cache"),
+        workers=1,
+    )
+    service.executor.shutdown()
+    service.executor = ThreadPoolExecutor(max_workers=2)
+    yield service
+    service.close()
+
+
+def test_parse_query():
+    params = parse_query(
+        "georange=20,28,120,130&crop_area=true&projection=Mercator"
+        "&style=%7B%22colormap%22%3A%22wind%22%7D"
+    )
+    assert params == {
+        "georange": ["20", "28", "120", "130"],
+        "crop_area": True,
+        "projection": "Mercator",
+        "style": {"colormap": "wind"},
+    }
+
+
+@pytest.mark.parametrize("params", [
+    {"save_path": "/tmp"},
+    {"filename": "../plot.py"},
+    {"georange": [1, 2, 3]},
+    {"projection": "__class__"},
+    {"projection_parameters": 3},
+    {"style": {"colormap": "../../missing"}},
+    {"style": {"unknown": 1}},
+])
+def test_request_config_rejects(service, params):
+    with pytest.raises(ValueError):
+        service.request_config(params)
+
+
+def test_request_config_missing_granule(service):
+    with pytest.raises(GranuleNotFoundError):
+        service.request_config({"filename": "missing.nc"})
+
+
+def test_key_depends_on_request(service):
+    a = service.key(service.request_config({"georange": [20, 28, 120, 130]}))
+    b = service.key(service.request_config({"georange": ["20", "28", "120", "130"]}))
+    c = service.key(service.request_config({"georange": [20, 28, 120, 131]}))
+    assert a == b != c
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_items=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    cache.get("a")
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1" and cache.get("c") == b"3"
+
+
+def test_identical_requests_are_coalesced(service, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_render(config):
+        calls.append(config)
+        started.set()
+        release.wait(10)
+        return b"png"
+
+    monkeypatch.setattr(render_server, "_render", slow_render)
+    params = {"georange": [20, 28, 120, 130]}
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(service.render(params)))
+        for _ in range(4)
+    ]
+    threads[0].start()
+    started.wait(10)
+    for thread in threads[1:]:
+        thread.start()
+    # let the other requests find the pending render
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(10)
+
+    assert len(calls) == 1
+    assert all(data == b"png" for data, _ in results)
+    sources = [source for _, source in results]
+    assert sources.count("render") == 1
+    assert set(sources) <= {"render", "coalesced", "memory"}
+    # waiters wake when the result is set, the cache is filled right after
+    for _ in range(100):
+        if not service._pending:
+            break
+        time.sleep(0.01)
+    assert service.render(params) == (b"png", "memory")
+    service.memory = MemoryCache()
+    assert service.render(params) == (b"png", "disk")
+
+
+def test_failed_render_is_not_cached(service, monkeypatch):
+    def failing_render(config):
+        raise RuntimeError("render failed")
+
+    monkeypatch.setattr(render_server, "_render", failing_render)
+    with pytest.raises(RuntimeError):
+        service.render({})
+    assert service._pending == {}
+    monkeypatch.setattr(render_server, "_render", lambda config: b"png")
+    assert service.render({}) == (b"png", "render")
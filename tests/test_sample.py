@@ -0,0 +1,57 @@
+import csv
+import os
+
+import numpy as np
+import pytest
+
+import sample
+from windReader.reader.ascat_l2 import ASCAT
+
+
+@pytest.fixture
+def points(ascat_file):
+    with ASCAT(ascat_file) as reader:
+        reader.load(qc=False)
+        rows, cols = np.nonzero(~np.ma.getmaskarray(reader.wind_spd))
+        picked = [(rows[i], cols[i]) for i in (0, len(rows) // 2)]
+        return [
+            (float(reader.latitude[r, c]), float(reader.longitude[r, c]),
+             reader.wvc_time[r] if reader.wvc_time.ndim == 1 else reader.wvc_time[r, c])
+            for r, c in picked
+        ]
+
+
+def _run(ascat_file, tmp_path, rows, fields):
+    obs = tmp_path / "obs.csv"
+    with open(obs, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        writer.writerows(rows)
+    out = tmp_path / "out.csv"
+    sample.main({
+        "source": os.path.dirname(ascat_file),
+        "filenames": [os.path.basename(ascat_file)],
+        "observations": str(obs),
+        "output": str(out),
+        "use_quality_control": False,
+        "workers": 1,
+    })
+    with open(out, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_observations_without_time_column(ascat_file, tmp_path, points):
+    rows = _run(ascat_file, tmp_path, [p[:2] for p in points], ("lat", "lon"))
+    assert [int(row["index"]) for row in rows] == [0, 1]
+
+
+def test_observations_with_and_without_time(ascat_file, tmp_path, points):
+    (lat0, lon0, t0), (lat1, lon1, _) = points
+    late = np.datetime64(t0, "s") + np.timedelta64(1, "D")
+    rows = _run(
+        ascat_file, tmp_path,
+        [(lat0, lon0, ""), (lat1, lon1, str(late))],
+        ("lat", "lon", "time"),
+    )
+    # the second observation is a day after the pass
+    assert [int(row["index"]) for row in rows] == [0]
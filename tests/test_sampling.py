@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from windReader.analysis.geo import EARTH_RADIUS_KM
+from windReader.analysis.sampling import PointSampler
+
+LATS = np.arange(20, 21, 0.1)
+LONS = np.arange(130, 131, 0.1)
+
+
+@pytest.fixture
+def reader(make_swath):
+    speed = np.arange(len(LATS) * len(LONS), dtype=np.float64).reshape(len(LATS), len(LONS))
+    return make_swath(LATS, LONS, speed=speed, u=speed / 10, v=-speed / 10)
+
+
+def _cell(reader, row, col):
+    # positions are stored as float32
+    return float(np.float32(reader.latitude[row, col])), float(np.float32(reader.longitude[row, col]))
+
+
+@pytest.mark.parametrize("method", ["nearest", "idw"])
+def test_point_on_cell_centre(reader, method):
+    lat, lon = _cell(reader, 4, 6)
+    result = PointSampler(reader).sample([lat], [lon], method=method, max_distance=30.)
+    assert result["speed"][0] == reader.wind_spd[4, 6]
+    assert result["u"][0] == np.float32(reader.wind_dir['v'][4, 6])
+    assert result["distance"][0] == 0
+    assert result["time"][0] == reader.wvc_time[4]
+
+
+def test_nearest_distance(reader):
+    lat, lon = _cell(reader, 4, 6)
+    result = PointSampler(reader).sample([lat + 0.03], [lon])
+    assert result["speed"][0] == reader.wind_spd[4, 6]
+    np.testing.assert_allclose(result["distance"], EARTH_RADIUS_KM * np.deg2rad(0.03), rtol=1e-3)
+
+
+def test_idw_between_two_cells(reader):
+    (lat, lon), (_, lon1) = _cell(reader, 4, 6), _cell(reader, 4, 7)
+    # halfway along the row, the cells above and below are farther away
+    result = PointSampler(reader).sample([lat], [(lon + lon1) / 2], method="idw", max_distance=6.)
+    np.testing.assert_allclose(result["speed"], reader.wind_spd[4, 6:8].mean(), rtol=1e-3)
+
+
+def test_points_outside_swath(reader):
+    result = PointSampler(reader).sample([10., 20.5], [130., 130.5], max_distance=20.)
+    assert np.isnan(result["speed"][0]) and np.isnat(result["time"][0])
+    assert np.isfinite(result["speed"][1])
+
+
+def test_max_time(reader):
+    lat, lon = _cell(reader, 4, 6)
+    t = reader.wvc_time[4]
+    times = np.array([t, t + np.timedelta64(2, "h"), "NaT"], dtype="datetime64[s]")
+    result = PointSampler(reader).sample([lat] * 3, [lon] * 3, times, max_time=30.)
+    assert np.isfinite(result["speed"][0])
+    assert np.isnan(result["speed"][1])
+    # points without a time are matched by distance only
+    assert result["speed"][2] == reader.wind_spd[4, 6]
+
+
+def test_unknown_method(reader):
+    with pytest.raises(ValueError):
+        PointSampler(reader).sample([20.], [130.], method="linear")
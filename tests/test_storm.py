@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from windReader.analysis.geo import great_circle_distance, initial_bearing
+from windReader.analysis.storm import QUADRANTS, analyze_storm
+
+CENTER = (20., 130.)
+# 0.05 degree cells, about 5.5 km apart
+LATS = np.arange(14, 26.001, 0.05)
+LONS = np.arange(124, 136.001, 0.05)
+# grid spacing tolerance of the radii, km
+TOLERANCE = 8.
+
+
+@pytest.fixture
+def vortex(make_swath):
+    """Winds falling by 1 kt every 10 km from 70 kt at the centre, 20%
+    stronger in the NE quadrant"""
+    lats, lons = np.meshgrid(LATS, LONS, indexing="ij")
+    dist = great_circle_distance(*CENTER, lats, lons)
+    bearing = initial_bearing(*CENTER, lats, lons)
+    speed = np.maximum(70 - dist / 10, 0) * np.where(bearing < 90, 1.2, 1.)
+    return make_swath(LATS, LONS, speed=speed)
+
+
+def test_quadrant_radii(vortex):
+    result = analyze_storm(vortex, CENTER)
+    radii = result["wind_radii"]
+    for threshold in (34, 50, 64):
+        expected = (70 - threshold) * 10
+        for quadrant in QUADRANTS[1:]:
+            assert abs(radii[threshold][quadrant] - expected) < TOLERANCE
+        expected_ne = (70 - threshold / 1.2) * 10
+        assert abs(radii[threshold]["NE"] - expected_ne) < TOLERANCE
+
+
+def test_max_wind(vortex):
+    result = analyze_storm(vortex, CENTER)
+    assert result["max_wind"] == pytest.approx(84., abs=1.)
+    assert result["rmw"] < TOLERANCE
+    assert result["max_wind_time"] is not None
+
+
+def test_max_radius_limits_radii(vortex):
+    result = analyze_storm(vortex, CENTER, max_radius=300.)
+    assert result["wind_radii"][34]["SW"] <= 300.
+    assert result["valid_cells"] < len(LATS) * len(LONS)
+
+
+def test_no_cells_above_threshold(vortex):
+    result = analyze_storm(vortex, CENTER, radii=(100,))
+    assert all(np.isnan(r) for r in result["wind_radii"][100].values())
+    empty = analyze_storm(vortex, (0., 0.))
+    assert empty["max_wind"] is None and empty["valid_cells"] == 0
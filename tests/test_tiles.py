@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from windReader.render.tiles import (
+    MAX_LATITUDE, TILE_SIZE, SwathTiles, TileCache, lonlat_to_global_pixel,
+    tile_georange,
+)
+
+
+def test_global_pixel_corners():
+    x, y = lonlat_to_global_pixel([-180, 0, 90], [MAX_LATITUDE, 0, -MAX_LATITUDE], 1)
+    np.testing.assert_allclose(x, [0, TILE_SIZE, 1.5 * TILE_SIZE])
+    np.testing.assert_allclose(y, [0, TILE_SIZE, 2 * TILE_SIZE], atol=1e-6)
+
+
+@pytest.mark.parametrize("zoom, x, y", [(1, 0, 1), (3, 5, 2), (6, 40, 30)])
+def test_tile_georange_round_trip(zoom, x, y):
+    latmin, latmax, lonmin, lonmax = tile_georange(zoom, x, y)
+    px, py = lonlat_to_global_pixel([lonmin, lonmax], [latmax, latmin], zoom)
+    np.testing.assert_allclose(px, [x * TILE_SIZE, (x + 1) * TILE_SIZE], atol=1e-6)
+    np.testing.assert_allclose(py, [y * TILE_SIZE, (y + 1) * TILE_SIZE], atol=1e-6)
+
+
+def _swath(lons, lats):
+    lons, lats = np.meshgrid(lons, lats)
+    speed = np.ma.array(np.full(lons.shape, 20.))
+    return SwathTiles(
+        lons, lats, speed, {'v': np.ma.zeros(lons.shape), 'h': np.ma.ones(lons.shape)}
+    )
+
+
+def test_tiles_and_cells_of_swath():
+    swath = _swath(np.linspace(121, 124, 13), np.linspace(21, 24, 13))
+    zoom = 4
+    x, y = lonlat_to_global_pixel([122.5], [22.5], zoom)
+    center = (int(x[0] // TILE_SIZE), int(y[0] // TILE_SIZE))
+    assert center in swath.tiles(zoom)
+    idx, px, py = swath.cells(zoom, *center)
+    assert len(idx) == len(swath.speed)
+    assert np.all((px > -TILE_SIZE) & (px < 2 * TILE_SIZE))
+    # a tile far from the swath has no cells
+    assert len(swath.cells(zoom, 0, 0)[0]) == 0
+
+
+def test_cells_wrap_around_antimeridian():
+    swath = _swath(np.linspace(179, 181, 9) - 360 * (np.linspace(179, 181, 9) > 180), [0.])
+    zoom = 3
+    idx, px, _ = swath.cells(zoom, 0, 2**zoom // 2 - 1)
+    assert len(idx) == 9
+    # western cells sit left of the tile instead of a world away
+    assert px.min() > -TILE_SIZE and px.max() < TILE_SIZE
+
+
+def test_tile_cache_key():
+    granule = {"path": "granule.nc", "mtime": 1}
+    a = TileCache.key(granule, 3, 1, 2, {"mode": "barbs"})
+    assert a == TileCache.key(dict(granule), 3, 1, 2, {"mode": "barbs"})
+    assert a != TileCache.key(granule, 3, 2, 1, {"mode": "barbs"})
+    assert a != TileCache.key(granule, 3, 1, 2, {"mode": "raster"})
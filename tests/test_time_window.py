@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from windReader.reader.ascat_l2 import ASCAT
+
+
+@pytest.fixture
+def reader(ascat_file):
+    with ASCAT(ascat_file) as reader:
+        yield reader
+
+
+def _window(reader, first, last):
+    times = reader._row_times()
+    return str(times[first]), str(times[last])
+
+
+def test_time_rows_without_window(reader):
+    assert reader._time_rows(None) == slice(None)
+    assert reader._offset == (0, 0)
+
+
+def test_time_rows_window(reader):
+    times = reader._row_times()
+    rows = reader._time_rows(_window(reader, 100, 199))
+    selected = np.arange(len(times))[rows]
+    assert selected[0] <= 100 and selected[-1] >= 199
+    assert np.all(times[rows] >= times[100]) and np.all(times[rows] <= times[199])
+    assert reader._offset == (int(selected[0]), 0)
+
+
+def test_time_rows_empty_window(reader):
+    with pytest.raises(ValueError):
+        reader._time_rows(("1990-01-01T00:00:00", "1990-01-01T01:00:00"))
+
+
+def test_load_window_matches_full_load(reader):
+    reader.load(qc=False)
+    full = reader.wind_spd
+    reader.load(qc=False, time_window=_window(reader, 100, 199))
+    row0 = reader._offset[0]
+    rows = reader.wind_spd.shape[0]
+    np.testing.assert_array_equal(
+        np.ma.getmaskarray(reader.wind_spd), np.ma.getmaskarray(full[row0:row0 + rows])
+    )
+    np.testing.assert_array_equal(
+        reader.wind_spd.filled(-1), full[row0:row0 + rows].filled(-1)
+    )
+
+
+def test_reload_without_window_resets_offset(reader):
+    reader.load(qc=False, time_window=_window(reader, 100, 199))
+    assert reader._offset != (0, 0)
+    reader.load(qc=False)
+    assert reader._offset == (0, 0)
+    cells = reader.compact()
+    # compact indices point into the swath as loaded
+    np.testing.assert_array_equal(
+        reader.wind_spd[cells.row, cells.col].astype(np.float32), cells.speed
+    )
+
+
+def test_crop_moves_offset(reader):
+    reader.load(qc=False, time_window=_window(reader, 100, 399))
+    row0 = reader._offset[0]
+    lats = reader.latitude
+    lat, lon = float(lats[150, 30]), float(reader.longitude[150, 30])
+    reader.crop((lat - 1, lat + 1, lon - 1, lon + 1))
+    assert reader._offset[0] > row0
+    cells = reader.compact()
+    full = ASCAT(reader.fname)
+    full.load(qc=False)
+    np.testing.assert_array_equal(
+        full.wind_spd[cells.row, cells.col].astype(np.float32), cells.speed
+    )
+    full.close()
+
+
+def test_crop_same_box_after_reload(reader):
+    reader.load(qc=False)
+    lat, lon = float(reader.latitude[550, 30]), float(reader.longitude[550, 30])
+    box = (lat - 1, lat + 1, lon - 1, lon + 1)
+    reader.crop(box)
+    reader.load(qc=False, time_window=_window(reader, 400, 700))
+    reader.crop(box)
+    fresh = ASCAT(reader.fname)
+    fresh.load(qc=False, time_window=_window(fresh, 400, 700))
+    fresh.crop(box)
+    assert reader._offset == fresh._offset
+    assert reader.wind_spd.shape == fresh.wind_spd.shape != (0, 17)
+    np.testing.assert_array_equal(reader.wind_spd.filled(-1), fresh.wind_spd.filled(-1))
+    fresh.close()
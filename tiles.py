@@ -0,0 +1,96 @@
+import json
+import re
+import time
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+from windReader.reader.qc import policy_from_config
+from windReader.render.tiles import (
+    SwathTiles, TileCache, TILE_SIZE, encode_png, pregenerate, render_tile
+)
+
+EMPTY_TILE = encode_png(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
+
+
+def make_handler(swath, cache, params):
+    """Request handler serving /{z}/{x}/{y}.png from the tile cache,
+    rendering missing tiles on demand"""
+    pattern = re.compile(r"^/(\d+)/(\d+)/(\d+)\.png$")
+
+    class TileHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            match = pattern.match(self.path.split("?")[0])
+            if not match:
+                self.send_error(404)
+                return
+            zoom, x, y = (int(g) for g in match.groups())
+            key = cache.key(swath.key, zoom, x, y, params)
+            data = cache.get(key)
+            if data is None:
+                img = render_tile(swath, zoom, x, y, **params)
+                data = b"" if img is None else encode_png(img)
+                cache.put(key, data)
+            if not data:
+                data = EMPTY_TILE
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(data)
+
+    return TileHandler
+
+
+def main(config, serve=False):
+    """read configs"""
+    # reader parameters
+    reader = config.get("reader", None)
+    route = config.get("source", None)
+    fname = config.get("filename", None)
+    band = config.get("wind_band", None)
+    quality_control = policy_from_config(config)
+    # tile parameters
+    zmin, zmax = config.get("zoom_range", (2, 7))
+    params = {
+        "mode": config.get("tile_mode", "barbs"),
+        "colormap": config.get("colormap", "wind"),
+        "barb_spacing": config.get("barb_spacing", 24),
+        "arrow_spacing": config.get("arrow_spacing", None),
+    }
+    cache_dir = config.get("cache_dir", "./tile_cache")
+    workers = config.get("workers", None)
+    port = config.get("port", 8000)
+
+    swath = SwathTiles.from_file(
+        f"{route}/{fname}", reader=reader, band=band, qc=quality_control
+    )
+    cache = TileCache(cache_dir)
+
+    t0 = time.perf_counter()
+    count = pregenerate(
+        swath, range(zmin, zmax + 1), cache_dir, workers=workers, **params
+    )
+    print(f"Rendered {count} tiles in {time.perf_counter() - t0:.2f}s")
+
+    if serve:
+        server = HTTPServer(("127.0.0.1", port), make_handler(swath, cache, params))
+        print(f"Serving tiles at http://127.0.0.1:{port}/{{z}}/{{x}}/{{y}}.png")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+
+
+# main codes
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='wind_tiles')
+    parser.add_argument('-c','--config_path', default='config.json')
+    parser.add_argument('-s','--serve', action='store_true')
+    args = parser.parse_args()
+    with open(args.config_path, "r") as f:
+        config = json.load(f)
+    main(config, serve=args.serve)
@@ -0,0 +1,3 @@
+from .storm import analyze_storm, analyze_batch
+from .collocation import collocate, collocate_files
+from .sampling import PointSampler
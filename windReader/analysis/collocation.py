@@ -0,0 +1,132 @@
+"""Collocation of wind cells from two scatterometer passes"""
+
+import numpy as np
+
+from windReader.reader import load_reader
+from windReader.analysis.geo import lonlat_to_xyz, km_to_chord, chord_to_km
+
+_EMPTY_FIELDS = (
+    "row_a", "col_a", "row_b", "col_b", "lat_a", "lon_a", "lat_b", "lon_b",
+    "time_a", "time_b", "distance", "time_diff", "speed_a", "speed_b",
+    "speed_diff", "dir_a", "dir_b", "dir_diff",
+)
+
+
+def valid_cells(reader):
+    """Flat arrays of the valid wind cells of a loaded reader, with their
+    row/col indices in the swath as loaded"""
+    compact = reader.compact()
+    cells = {
+        name: getattr(compact, name).astype(np.float64)
+        for name in ("lat", "lon", "speed", "u", "v")
+    }
+    cells.update(row=compact.row, col=compact.col, time=compact.time)
+    return cells
+
+
+def _subset(cells, keep):
+    return {k: a[keep] for k, a in cells.items()}
+
+
+def _within_span(times, other, window):
+    """Whether times are within window of the time span of other"""
+    other = other[~np.isnat(other)]
+    if not len(other):
+        return np.zeros(len(times), dtype=bool)
+    return (times >= other.min() - window) & (times <= other.max() + window)
+
+
+def _build_tree(cells):
+    from scipy.spatial import cKDTree
+    return cKDTree(lonlat_to_xyz(cells["lat"], cells["lon"]))
+
+
+def _empty_result():
+    result = {k: np.empty(0) for k in _EMPTY_FIELDS}
+    for k in ("row_a", "col_a", "row_b", "col_b"):
+        result[k] = np.empty(0, dtype=np.intp)
+    for k in ("time_a", "time_b"):
+        result[k] = np.empty(0, dtype="datetime64[s]")
+    return result
+
+
+def collocate(reader_a, reader_b, max_distance=25., max_time=30., nearest=True):
+    """Matched cell pairs of two loaded readers.
+
+    Cells match when closer than `max_distance` (km) and, unless
+    `max_time` is `None`, observed within `max_time` minutes of each other.
+    With `nearest`, each cell of reader_a keeps only its closest match.
+
+    Returns a dict of flat arrays, one entry per pair: row/col indices,
+    positions and times of both cells, distance (km), time_diff (s, b - a),
+    speeds, directions (deg) and their differences (b - a, directions
+    wrapped to [-180, 180)).
+    """
+    cells_a, cells_b = valid_cells(reader_a), valid_cells(reader_b)
+    if max_time is not None:
+        window = np.timedelta64(int(max_time * 60), "s")
+        # cells outside the time span of the other pass can never match
+        cells_b = _subset(cells_b, _within_span(cells_b["time"], cells_a["time"], window))
+        cells_a = _subset(cells_a, _within_span(cells_a["time"], cells_b["time"], window))
+    if not len(cells_a["lat"]) or not len(cells_b["lat"]):
+        return _empty_result()
+
+    tree_a, tree_b = _build_tree(cells_a), _build_tree(cells_b)
+    pairs = tree_a.sparse_distance_matrix(
+        tree_b, km_to_chord(max_distance), output_type="ndarray"
+    )
+    ia, ib = pairs["i"].astype(np.intp), pairs["j"].astype(np.intp)
+    distance = chord_to_km(pairs["v"])
+
+    time_diff = (cells_b["time"][ib] - cells_a["time"][ia]).astype(np.float64)
+    time_diff[np.isnat(cells_b["time"][ib]) | np.isnat(cells_a["time"][ia])] = np.nan
+    if max_time is not None:
+        keep = np.abs(time_diff) <= max_time * 60
+        ia, ib, distance, time_diff = ia[keep], ib[keep], distance[keep], time_diff[keep]
+
+    if nearest and len(ia):
+        # closest match per cell of reader_a
+        order = np.lexsort((distance, ia))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = ia[order][1:] != ia[order][:-1]
+        keep = order[first]
+        ia, ib, distance, time_diff = ia[keep], ib[keep], distance[keep], time_diff[keep]
+
+    dir_a = np.rad2deg(np.arctan2(cells_a["u"][ia], cells_a["v"][ia])) % 360
+    dir_b = np.rad2deg(np.arctan2(cells_b["u"][ib], cells_b["v"][ib])) % 360
+    return {
+        "row_a": cells_a["row"][ia],
+        "col_a": cells_a["col"][ia],
+        "row_b": cells_b["row"][ib],
+        "col_b": cells_b["col"][ib],
+        "lat_a": cells_a["lat"][ia],
+        "lon_a": cells_a["lon"][ia],
+        "lat_b": cells_b["lat"][ib],
+        "lon_b": cells_b["lon"][ib],
+        "time_a": cells_a["time"][ia],
+        "time_b": cells_b["time"][ib],
+        "distance": distance,
+        "time_diff": time_diff,
+        "speed_a": cells_a["speed"][ia],
+        "speed_b": cells_b["speed"][ib],
+        "speed_diff": cells_b["speed"][ib] - cells_a["speed"][ia],
+        "dir_a": dir_a,
+        "dir_b": dir_b,
+        "dir_diff": (dir_b - dir_a + 180) % 360 - 180,
+    }
+
+
+def collocate_files(fname_a, fname_b, reader_a="auto", reader_b="auto",
+                    band_a=None, band_b=None, qc=True, **kwargs):
+    """Load two granules and collocate them, see `collocate`"""
+    reader_a = load_reader(fname_a, reader=reader_a, band=band_a, qc=qc)
+    try:
+        reader_b = load_reader(fname_b, reader=reader_b, band=band_b, qc=qc)
+    except Exception:
+        reader_a.close()
+        raise
+    try:
+        return collocate(reader_a, reader_b, **kwargs)
+    finally:
+        reader_a.close()
+        reader_b.close()
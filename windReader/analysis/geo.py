@@ -0,0 +1,45 @@
+"""Spherical geometry helpers"""
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def great_circle_distance(lat0, lon0, lats, lons):
+    """Haversine distance in km from (lat0, lon0) to each of lats/lons"""
+    lat0, lon0 = np.deg2rad(lat0), np.deg2rad(lon0)
+    lats, lons = np.deg2rad(lats), np.deg2rad(lons)
+    a = (
+        np.sin((lats - lat0) / 2)**2
+        + np.cos(lat0) * np.cos(lats) * np.sin((lons - lon0) / 2)**2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def initial_bearing(lat0, lon0, lats, lons):
+    """Bearing in degrees clockwise from north, from (lat0, lon0) to lats/lons"""
+    lat0, lon0 = np.deg2rad(lat0), np.deg2rad(lon0)
+    lats, lons = np.deg2rad(lats), np.deg2rad(lons)
+    dlon = lons - lon0
+    x = np.sin(dlon) * np.cos(lats)
+    y = np.cos(lat0) * np.sin(lats) - np.sin(lat0) * np.cos(lats) * np.cos(dlon)
+    return np.rad2deg(np.arctan2(x, y)) % 360
+
+
+def lonlat_to_xyz(lats, lons):
+    """Unit-sphere cartesian coordinates, stacked along the last axis"""
+    lats, lons = np.deg2rad(lats), np.deg2rad(lons)
+    cos_lat = np.cos(lats)
+    return np.stack(
+        [cos_lat * np.cos(lons), cos_lat * np.sin(lons), np.sin(lats)], axis=-1
+    )
+
+
+def km_to_chord(km):
+    """Chord length on the unit sphere of a great circle distance in km"""
+    return 2 * np.sin(np.asarray(km) / (2 * EARTH_RADIUS_KM))
+
+
+def chord_to_km(chord):
+    """Great circle distance in km of a chord length on the unit sphere"""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
@@ -0,0 +1,85 @@
+"""Sampling of swath winds at point observations (buoys, ships)"""
+
+import numpy as np
+
+from windReader.analysis.collocation import valid_cells, _build_tree
+from windReader.analysis.geo import lonlat_to_xyz, km_to_chord, chord_to_km
+
+# candidate cells looked at per point, the nearest one passing the time
+# window is used (or all passing ones for inverse-distance weighting)
+CANDIDATES = 8
+
+
+class PointSampler(object):
+    """Spatial index over the valid cells of a loaded reader, built once
+    and reused for any number of points."""
+
+    def __init__(self, reader):
+        self.cells = valid_cells(reader)
+        self.tree = _build_tree(self.cells) if len(self.cells["lat"]) else None
+
+    def sample(self, lats, lons, times=None, method="nearest",
+               max_distance=50., max_time=None, k=CANDIDATES, power=2):
+        """Winds at the points given.
+
+        `method` is "nearest" or "idw" (inverse-distance weighting of the
+        cells within max_distance km). With `times` (datetime64 or datetime)
+        and `max_time` (minutes), only cells observed within the window
+        are used; points without a time (NaT) are matched by distance
+        only. Returns a dict of arrays with speed, u, v, the cell time
+        and distance (km) of the nearest cell used, NaN/NaT where no cell
+        is found.
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        n = len(lats)
+        result = {
+            "speed": np.full(n, np.nan),
+            "u": np.full(n, np.nan),
+            "v": np.full(n, np.nan),
+            "time": np.full(n, np.datetime64("NaT"), dtype="datetime64[s]"),
+            "distance": np.full(n, np.nan),
+        }
+        if self.tree is None or n == 0:
+            return result
+
+        k = min(k if method == "idw" or max_time is not None else 1, len(self.cells["lat"]))
+        chord, idx = self.tree.query(
+            lonlat_to_xyz(lats, lons),
+            k=k,
+            distance_upper_bound=km_to_chord(max_distance),
+        )
+        chord, idx = chord.reshape(n, k), idx.reshape(n, k)
+        # missing neighbours are reported with index len(cells)
+        ok = idx < len(self.cells["lat"])
+        idx = np.where(ok, idx, 0)
+        if times is not None and max_time is not None:
+            times = np.atleast_1d(np.asarray(times, dtype="datetime64[s]"))
+            dt = np.abs(self.cells["time"][idx] - times[:, None])
+            ok &= np.isnat(times)[:, None] | (dt <= np.timedelta64(int(max_time * 60), "s"))
+
+        found = ok.any(axis=1)
+        # neighbours are sorted by distance, first passing one is nearest
+        first = np.argmax(ok, axis=1)
+        nearest = idx[np.arange(n), first]
+        result["time"][found] = self.cells["time"][nearest[found]]
+        result["distance"][found] = chord_to_km(chord[np.arange(n), first][found])
+
+        if method == "nearest":
+            for name in ("speed", "u", "v"):
+                result[name][found] = self.cells[name][nearest[found]]
+        elif method == "idw":
+            dist = chord_to_km(np.where(ok, chord, np.inf))
+            with np.errstate(divide="ignore"):
+                weight = np.where(ok, 1 / dist**power, 0.)
+            # points on a cell centre take its value
+            exact = ok & (dist == 0)
+            has_exact = exact.any(axis=1)
+            weight[has_exact] = exact[has_exact]
+            wsum = weight.sum(axis=1)
+            for name in ("speed", "u", "v"):
+                value = (weight * self.cells[name][idx]).sum(axis=1)
+                result[name][found] = value[found] / wsum[found]
+        else:
+            raise ValueError(f"Sampling method {method} not supported.")
+        return result
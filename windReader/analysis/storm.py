@@ -0,0 +1,93 @@
+"""Storm wind structure from scatterometer passes"""
+
+import numpy as np
+
+from windReader.reader import load_reader
+from windReader.analysis.geo import great_circle_distance, initial_bearing
+
+WIND_RADII_KT = (34, 50, 64)
+QUADRANTS = ("NE", "SE", "SW", "NW")
+
+
+def analyze_storm(reader, center, radii=WIND_RADII_KT, max_radius=800.):
+    """Wind structure around storm centre for a loaded (or cropped) reader.
+
+    `center` is (lat, lon) in degrees, `radii` are wind thresholds in knots
+    and `max_radius` is the search radius in km. Returns a dict with max
+    wind and its location, radius of maximum wind (rmw) and wind radii by
+    quadrant (km, NaN if no cells reach the threshold).
+    """
+    lat0, lon0 = center
+    # only the valid cells are looked at
+    cells = reader.compact()
+    spd = cells.speed.astype(np.float64)
+    lats = cells.lat.astype(np.float64)
+    lons = cells.lon.astype(np.float64)
+    # distances and bearings are computed once, everything below reuses them
+    dist = great_circle_distance(lat0, lon0, lats, lons)
+    bearing = initial_bearing(lat0, lon0, lats, lons)
+
+    valid = dist <= max_radius
+    result = {
+        "center": (lat0, lon0),
+        "max_wind": None,
+        "max_wind_lat": None,
+        "max_wind_lon": None,
+        "max_wind_time": None,
+        "rmw": None,
+        "wind_radii": {
+            r: dict.fromkeys(QUADRANTS, np.nan) for r in radii
+        },
+        "valid_cells": int(valid.sum()),
+    }
+    if not valid.any():
+        return result
+
+    idx = np.argmax(np.where(valid, spd, -np.inf))
+    time = cells.time[idx]
+    result.update({
+        "max_wind": float(spd[idx]),
+        "max_wind_lat": float(lats[idx]),
+        "max_wind_lon": float(lons[idx]),
+        "max_wind_time": None if np.isnat(time) else time.astype(object),
+        "rmw": float(dist[idx]),
+    })
+
+    # (radii, quadrants, cells) boolean reduction
+    quad = np.floor(bearing[valid] / 90).astype(np.intp) % 4
+    in_quad = quad[None, :] == np.arange(4)[:, None]
+    above = spd[valid][None, :] >= np.asarray(radii, dtype=np.float64)[:, None]
+    extent = np.where(
+        above[:, None, :] & in_quad[None, :, :],
+        dist[valid][None, None, :],
+        -np.inf
+    ).max(axis=-1, initial=-np.inf)
+    extent[np.isinf(extent)] = np.nan
+    for i, r in enumerate(radii):
+        result["wind_radii"][r] = dict(zip(QUADRANTS, extent[i].tolist()))
+    return result
+
+
+def analyze_batch(pairs, reader="auto", band=None, qc=True, **kwargs):
+    """Analyze a batch of (filename, (lat, lon)) pairs.
+
+    Each granule is loaded once for all centres given for it. Results are
+    returned in the order of `pairs`, with `None` for unreadable files.
+    """
+    groups = {}
+    for i, (fname, center) in enumerate(pairs):
+        groups.setdefault(fname, []).append((i, center))
+
+    results = [None] * len(pairs)
+    for fname, items in groups.items():
+        try:
+            reader_ = load_reader(fname, reader=reader, band=band, qc=qc)
+        except ValueError as e:
+            print(f"{fname}:", e)
+            continue
+        for i, center in items:
+            result = analyze_storm(reader_, center, **kwargs)
+            result["filename"] = fname
+            results[i] = result
+        reader_.close()
+    return results
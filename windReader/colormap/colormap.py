@@ -103,3 +103,11 @@ def get_colormap(name):
         return 0
     vmin, vmax, colormap = parse_colormap(data)
     return LSCMAP(name, colormap), vmin, vmax
+
+
+def available_colormaps():
+    """Names of the colormaps shipped with the package"""
+    return sorted(
+        os.path.splitext(os.path.basename(f))[0]
+        for f in glob.glob(os.path.join(os.path.dirname(__file__), "*.txt"))
+    )
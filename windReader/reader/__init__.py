@@ -3,6 +3,10 @@ from .oscat_l2 import OSCAT
 from .hscat_l2b import HSCAT
 from .cscat_l2b import CSCAT
 from .windrad_l2 import WindRAD
+from .pool import HandlePool, set_handle_pool, get_handle_pool
+from .metadata import Metadata
+from .pyramid import SwathPyramid
+from .compact import CompactSwath
 
 _WIND_READERS = {
     "ascat_nc": ASCAT,
@@ -27,7 +31,8 @@ def find_reader(fname, reader=None):
             if _reader not in _reader_list:
                 raise ValueError(f"Reader {reader} not found.")
             print(f"Trying reader {_reader} to load...")
-            _WIND_READERS[_reader](fname)
+            with _WIND_READERS[_reader](fname) as _probe:
+                metadata = _probe.metadata
         except ValueError:
             continue
         except Exception as e:
@@ -36,6 +41,36 @@ def find_reader(fname, reader=None):
         else:
             return {
                 'name': _reader,
-                'class': _WIND_READERS[_reader]
+                'class': _WIND_READERS[_reader],
+                'metadata': metadata
             }
     return None
+
+def load_reader(fname, reader=None, band=None, qc=True, pyramid_dir=None,
+                resolution_km=None, time_window=None):
+    """Find reader for the file given and load wind data.
+    With pyramid_dir, the coarsest pyramid level still finer than
+    resolution_km (km) is loaded instead of the native swath. With
+    time_window (t0, t1), only the rows observed within it are read."""
+    reader_config = find_reader(fname, reader=reader)
+    if reader_config is None:
+        raise ValueError("No reader matched for this file.")
+    reader = reader_config['class'](fname)
+    try:
+        if pyramid_dir and time_window is None:
+            reader.load_pyramid(pyramid_dir, resolution_km, band, qc=qc)
+        elif reader.WIND_DATASETS_ID:
+            reader.load(band, qc=qc, time_window=time_window)
+        else:
+            reader.load(qc=qc, time_window=time_window)
+    except Exception:
+        reader.close()
+        raise
+    return reader
+
+def read_metadata(fname, reader=None):
+    """Metadata snapshot of the file given, `None` if no reader matched"""
+    reader_config = find_reader(fname, reader=reader)
+    if reader_config is None:
+        return None
+    return reader_config['metadata']
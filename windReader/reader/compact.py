@@ -0,0 +1,108 @@
+"""Compact struct-of-arrays of the valid wind cells"""
+
+import csv
+
+import numpy as np
+
+from windReader.reader.utils import to_datetime64
+
+FIELDS = ("lat", "lon", "speed", "u", "v", "time", "row", "col")
+
+
+class CompactSwath(object):
+    """Valid cells of a loaded reader as flat arrays.
+
+    The arrays are built with a single boolean compress after `load` (and
+    `crop`), so plotting and statistics only touch valid cells. `row` and
+    `col` are the indices of each cell in the swath as loaded, before any
+    crop.
+    """
+
+    def __init__(self, lat, lon, speed, u, v, time, row, col, shape=None):
+        self.lat = lat
+        self.lon = lon
+        self.speed = speed
+        self.u = u
+        self.v = v
+        self.time = time
+        self.row = row
+        self.col = col
+        self.shape = shape
+
+    @classmethod
+    def from_reader(cls, reader):
+        lons, lats = reader.get_lonlats()
+        wind_speed, wind_dir = reader.get_values()
+        shape = np.shape(wind_speed)
+        spd = np.ma.getdata(wind_speed)
+        valid = (
+            ~np.ma.getmaskarray(wind_speed)
+            & ~np.ma.getmaskarray(lats)
+            & ~np.ma.getmaskarray(lons)
+            & np.isfinite(spd)
+        )
+        rows, cols = np.nonzero(valid)
+        row0, col0 = getattr(reader, "_offset", (0, 0))
+        times = reader.wvc_time
+        if times is None:
+            time = np.full(len(rows), np.datetime64("NaT"), dtype="datetime64[s]")
+        else:
+            time = to_datetime64(times, shape)[valid]
+        return cls(
+            np.ma.getdata(lats)[valid].astype(np.float32),
+            np.ma.getdata(lons)[valid].astype(np.float32),
+            spd[valid].astype(np.float32),
+            np.ma.getdata(wind_dir['v'])[valid].astype(np.float32),
+            np.ma.getdata(wind_dir['h'])[valid].astype(np.float32),
+            time,
+            (rows + row0).astype(np.int32),
+            (cols + col0).astype(np.int32),
+            shape,
+        )
+
+    def __len__(self):
+        return len(self.speed)
+
+    def subset(self, keep):
+        """Cells selected by a boolean mask or indices"""
+        return CompactSwath(
+            *(getattr(self, name)[keep] for name in FIELDS), shape=self.shape
+        )
+
+    def crop(self, ll_box):
+        latmin, latmax, lonmin, lonmax = ll_box
+        return self.subset(
+            (self.lat >= latmin) & (self.lat <= latmax)
+            & (self.lon >= lonmin) & (self.lon <= lonmax)
+        )
+
+    def get_lonlats(self):
+        return self.lon, self.lat
+
+    def get_values(self):
+        return self.speed, {'v': self.u, 'h': self.v}
+
+    def max_speed(self):
+        """Max wind speed and its index, `(None, None)` if empty"""
+        if not len(self):
+            return None, None
+        i = int(np.argmax(self.speed))
+        return float(self.speed[i]), i
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in FIELDS}
+
+    def to_csv(self, fname):
+        with open(fname, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            writer.writerows(zip(
+                np.round(self.lat.astype(np.float64), 4).tolist(),
+                np.round(self.lon.astype(np.float64), 4).tolist(),
+                np.round(self.speed.astype(np.float64), 2).tolist(),
+                np.round(self.u.astype(np.float64), 2).tolist(),
+                np.round(self.v.astype(np.float64), 2).tolist(),
+                self.time.astype(str).tolist(),
+                self.row.tolist(),
+                self.col.tolist(),
+            ))
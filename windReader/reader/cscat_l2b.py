@@ -1,29 +1,38 @@
 import numpy as np
 from datetime import datetime
 from windReader.reader.wind_base import WIND_BASE
+from windReader.reader.metadata import Metadata
+from windReader.reader.qc import QCPolicy
+from windReader.reader.utils import parse_times
 
 class CSCAT(WIND_BASE):
 
+    QC_POLICIES = {
+        "default": QCPolicy("default", check=(1 << 22) - 1),
+    }
+
     def __init__(self, fname):
         super(CSCAT, self).__init__(fname, engine='netcdf4')
-        if not self.platform_name.startswith("CFOSAT"):
+
+    def _check_datasets(self):
+        if not self.attrs['platform'].startswith("CFOSAT"):
             raise ValueError("Satellite not matched")
 
     @staticmethod
     def _autodecode(string, encoding="utf-8"):
         return string.decode(encoding) if isinstance(string, bytes) else string
 
-    def _quality_control(self, data, qc_flag):
-        bitmask = (1 << 22) - 1
-        truncated = qc_flag & bitmask
-        return np.ma.array(
-            data,
-            mask=truncated,
-            dtype=data.dtype,
-            fill_value=data.fill_value
-        )
+    @staticmethod
+    def _join_chars(times):
+        if times.dtype.kind == "S" and times.ndim == 2:
+            # character array, join the characters of each row time
+            times = np.ascontiguousarray(np.ma.getdata(times)).view(
+                f"S{times.shape[1]}"
+            )[:, 0]
+        return times
 
     def _calc_wvc_time(self, times):
+        times = self._join_chars(times)
         out = np.empty(times.shape, dtype=object)
         for idx, t in np.ndenumerate(times):
             time_str = self._autodecode(t).strip()
@@ -42,45 +51,43 @@ class CSCAT(WIND_BASE):
         h = spd * np.cos(np.deg2rad(dir))
         return {'v': v, 'h': h}
 
-    def load(self, qc=True):
+    def _row_times(self):
+        times = self._join_chars(self._datasets.variables["row_time"][:])
+        # "%Y-%m-%dT%H:%M:%SZ", invalid times become NaT
+        return parse_times(np.char.rstrip(np.char.strip(times.astype(str)), "Z"))
+
+    def load(self, qc=True, time_window=None):
+        rows = self._time_rows(time_window)
+        self._reset_qc()
         self.wvc_time = self._calc_wvc_time(
-            self._datasets.variables["row_time"][:]
+            self._datasets.variables["row_time"][rows]
         )
         self.wind_spd = self._calc_wind_spd(
-            self._datasets.variables["wind_speed_selection"][:],
+            self._datasets.variables["wind_speed_selection"][rows],
         )
         self.wind_dir = self._calc_wind_dir(
             self.wind_spd,
-            self._datasets.variables["wind_dir_selection"][:],
+            self._datasets.variables["wind_dir_selection"][rows],
         )
-        self.latitude = self._datasets.variables["wvc_lat"][:]
-        self.longitude = self._datasets.variables["wvc_lon"][:]
+        self.latitude = self._datasets.variables["wvc_lat"][rows]
+        self.longitude = self._datasets.variables["wvc_lon"][rows]
         if qc:
             # quality control by qc flags
-            qc_flag = self._datasets.variables["wvc_quality"][:]
-            self.wind_spd = self._quality_control(self.wind_spd, qc_flag)
-            self.wind_dir["v"] = self._quality_control(self.wind_dir["v"], qc_flag)
-            self.wind_dir["h"] = self._quality_control(self.wind_dir["h"], qc_flag)
+            qc_flag = self._datasets.variables["wvc_quality"][rows]
+            self._apply_qc(qc_flag, qc)
 
-    @property
-    def attrs(self):
+    def _read_attrs(self):
         return {k: self._autodecode(v) for k, v in self._datasets.__dict__.items()}
 
-    @property
-    def platform_name(self):
-        return self.attrs['platform'] + " " + self.attrs['sensor'] + " Level 2B"
-
-    @property
-    def resolution(self):
-        res = float(self.attrs['geospatial_lon_resolution'])
-        return "%.1f" % round(res * 100) + " KM"
-
-    @property
-    def start_time(self):
-        time = self.attrs['time_coverage_start']
-        return datetime.strptime(time, "%Y-%m-%dT%H:%M:%SZ")
-
-    @property
-    def end_time(self):
-        time = self.attrs['time_coverage_end']
-        return datetime.strptime(time, "%Y-%m-%dT%H:%M:%SZ")
+    def _build_metadata(self):
+        attrs = self.attrs
+        res = float(attrs['geospatial_lon_resolution'])
+        return Metadata(
+            reader=self.__class__.__name__,
+            platform=attrs['platform'],
+            sensor=attrs['sensor'],
+            level="Level 2B",
+            resolution="%.1f" % round(res * 100) + " KM",
+            start_time=datetime.strptime(attrs['time_coverage_start'], "%Y-%m-%dT%H:%M:%SZ"),
+            end_time=datetime.strptime(attrs['time_coverage_end'], "%Y-%m-%dT%H:%M:%SZ"),
+        )
@@ -1,11 +1,20 @@
 import numpy as np
 from datetime import datetime
 from windReader.reader.wind_base import WIND_BASE
+from windReader.reader.metadata import Metadata
+from windReader.reader.qc import QCPolicy
+from windReader.reader.utils import parse_times
 
 class HSCAT(WIND_BASE):
 
+    QC_POLICIES = {
+        "default": QCPolicy("default", check=(1 << 31) - 1),
+    }
+
     def __init__(self, fname):
         super(HSCAT, self).__init__(fname, engine='h5py')
+
+    def _check_datasets(self):
         if not self.attrs['Instrument_ShorName'].startswith("HSCAT"):
             raise ValueError("Satellite not matched")
 
@@ -13,16 +22,6 @@ class HSCAT(WIND_BASE):
     def _autodecode(string, encoding="utf-8"):
         return string.decode(encoding) if isinstance(string, bytes) else string
 
-    def _quality_control(self, data, qc_flag):
-        bitmask = (1 << 31) - 1
-        truncated = qc_flag & bitmask
-        return np.ma.array(
-            data,
-            mask=truncated,
-            dtype=data.dtype,
-            fill_value=data.fill_value
-        )
-
     def _calc_wvc_time(self, times):
         out = np.empty(times.shape, dtype=object)
         for idx, t in np.ndenumerate(times):
@@ -52,48 +51,52 @@ class HSCAT(WIND_BASE):
         h = spd * np.cos(np.deg2rad(dir))
         return {'v': v, 'h': h}
 
-    def load(self, qc=True):
+    def _row_times(self):
+        times = np.char.strip(
+            np.char.decode(np.asarray(self._datasets["wvc_row_time"][:]).astype(bytes))
+        )
+        # "%Y%m%dT%H:%M:%S" to ISO 8601, invalid times become NaT
+        iso = [
+            f"{t[:4]}-{t[4:6]}-{t[6:8]}{t[8:]}" if len(t) == 17 else "NaT"
+            for t in times.ravel().tolist()
+        ]
+        return parse_times(iso)
+
+    def load(self, qc=True, time_window=None):
+        rows = self._time_rows(time_window)
+        self._reset_qc()
         self.wvc_time = self._calc_wvc_time(
-            self._datasets["wvc_row_time"][:]
+            self._datasets["wvc_row_time"][rows]
         )
         self.wind_spd = self._calc_wind_spd(
-            self._datasets["wind_speed_selection"][:],
+            self._datasets["wind_speed_selection"][rows],
             self._datasets["wind_speed_selection"].attrs["scale_factor"],
             self._datasets["wind_speed_selection"].attrs["add_offset"]
         )
         self.wind_dir = self._calc_wind_dir(
             self.wind_spd,
-            self._datasets["wind_dir_selection"][:],
+            self._datasets["wind_dir_selection"][rows],
             self._datasets["wind_dir_selection"].attrs["scale_factor"],
             self._datasets["wind_dir_selection"].attrs["add_offset"]
         )
-        self.latitude = self._datasets["wvc_lat"][:]
-        self.longitude = self._datasets["wvc_lon"][:]
+        self.latitude = self._datasets["wvc_lat"][rows]
+        self.longitude = self._datasets["wvc_lon"][rows]
         if qc:
             # quality control by qc flags
-            qc_flag = self._datasets["wvc_quality_flag"][:]
-            self.wind_spd = self._quality_control(self.wind_spd, qc_flag)
-            self.wind_dir["v"] = self._quality_control(self.wind_dir["v"], qc_flag)
-            self.wind_dir["h"] = self._quality_control(self.wind_dir["h"], qc_flag)
+            qc_flag = self._datasets["wvc_quality_flag"][rows]
+            self._apply_qc(qc_flag, qc)
 
-    @property
-    def attrs(self):
+    def _read_attrs(self):
         return {k: self._autodecode(v[-1]) for k, v in self._datasets.attrs.items()}
 
-    @property
-    def platform_name(self):
-        return self.attrs['Platform_ShortName'] + " " + self.attrs['Instrument_ShorName'] + " Level 2B"
-
-    @property
-    def resolution(self):
-        return "25.0 KM"
-
-    @property
-    def start_time(self):
-        time = self.attrs['Range_Beginning_Time']
-        return datetime.strptime(time, "%Y%m%dT%H:%M:%S")
-
-    @property
-    def end_time(self):
-        time = self.attrs['Range_Ending_Time']
-        return datetime.strptime(time, "%Y%m%dT%H:%M:%S")
+    def _build_metadata(self):
+        attrs = self.attrs
+        return Metadata(
+            reader=self.__class__.__name__,
+            platform=attrs['Platform_ShortName'],
+            sensor=attrs['Instrument_ShorName'],
+            level="Level 2B",
+            resolution="25.0 KM",
+            start_time=datetime.strptime(attrs['Range_Beginning_Time'], "%Y%m%dT%H:%M:%S"),
+            end_time=datetime.strptime(attrs['Range_Ending_Time'], "%Y%m%dT%H:%M:%S"),
+        )
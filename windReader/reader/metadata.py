@@ -0,0 +1,41 @@
+"""Metadata snapshot of a wind data file"""
+
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Metadata(object):
+    """File level metadata captured once when a reader opens a file.
+
+    It does not reference the file, so it stays valid after the reader is
+    closed and can be serialized with `to_dict`/`from_dict`.
+    """
+    reader: str
+    platform: str
+    sensor: str
+    level: str
+    resolution: Optional[str]
+    start_time: datetime
+    end_time: datetime
+    bands: Tuple[str, ...] = field(default_factory=tuple)
+
+    @property
+    def platform_name(self):
+        return " ".join(s for s in (self.platform, self.sensor, self.level) if s)
+
+    def to_dict(self):
+        data = asdict(self)
+        data["start_time"] = self.start_time.isoformat()
+        data["end_time"] = self.end_time.isoformat()
+        data["bands"] = list(self.bands)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        data["start_time"] = datetime.fromisoformat(data["start_time"])
+        data["end_time"] = datetime.fromisoformat(data["end_time"])
+        data["bands"] = tuple(data.get("bands", ()))
+        return cls(**data)
@@ -1,11 +1,19 @@
 import numpy as np
 from datetime import datetime, timedelta
 from windReader.reader.wind_base import WIND_BASE
+from windReader.reader.metadata import Metadata
+from windReader.reader.qc import QCPolicy
 
 class OSCAT(WIND_BASE):
 
+    QC_POLICIES = {
+        "default": QCPolicy("default", check=(1 << 22) - 1),
+    }
+
     def __init__(self, fname):
         super(OSCAT, self).__init__(fname, engine='netcdf4')
+
+    def _check_datasets(self):
         if not self.attrs['title_short_name'].startswith("OSCAT"):
             raise ValueError("Satellite not matched")
 
@@ -13,16 +21,6 @@ class OSCAT(WIND_BASE):
     def _autodecode(string, encoding="utf-8"):
         return string.decode(encoding) if isinstance(string, bytes) else string
 
-    def _quality_control(self, data, qc_flag):
-        bitmask = (1 << 22) - 1
-        truncated = qc_flag & bitmask
-        return np.ma.array(
-            data,
-            mask=truncated,
-            dtype=data.dtype,
-            fill_value=data.fill_value
-        )
-
     def _calc_wvc_time(self, seconds):
         # calculate wvc time from 1990-01-01 00:00 UTC
         t0 = datetime(1990, 1, 1, 0, 0, 0)
@@ -40,46 +38,49 @@ class OSCAT(WIND_BASE):
         h = spd * np.cos(np.deg2rad(dir))
         return {'v': v, 'h': h}
 
-    def load(self, qc=True):
+    def _row_times(self):
+        # earliest cell time of each row, seconds from 1990-01-01 00:00 UTC
+        seconds = np.ma.min(self._datasets.variables["time"][:], axis=1)
+        times = np.datetime64("1990-01-01T00:00:00", "s") + np.ma.getdata(
+            seconds
+        ).astype("timedelta64[s]")
+        times[np.ma.getmaskarray(seconds)] = np.datetime64("NaT")
+        return times
+
+    def load(self, qc=True, time_window=None):
+        rows = self._time_rows(time_window)
+        self._reset_qc()
         self.wvc_time = self._calc_wvc_time(
-            self._datasets.variables["time"][:]
+            self._datasets.variables["time"][rows]
         )
         self.wind_spd = self._calc_wind_spd(
-            self._datasets.variables["wind_speed"][:]
+            self._datasets.variables["wind_speed"][rows]
         )
         self.wind_dir = self._calc_wind_dir(
             self.wind_spd,
-            self._datasets.variables["wind_dir"][:]
+            self._datasets.variables["wind_dir"][rows]
         )
-        self.latitude = self._datasets.variables["lat"][:]
-        self.longitude = self._datasets.variables["lon"][:]
+        self.latitude = self._datasets.variables["lat"][rows]
+        self.longitude = self._datasets.variables["lon"][rows]
         if qc:
             # quality control by qc flags
-            qc_flag = self._datasets.variables["wvc_quality_flag"][:]
-            self.wind_spd = self._quality_control(self.wind_spd, qc_flag)
-            self.wind_dir["v"] = self._quality_control(self.wind_dir["v"], qc_flag)
-            self.wind_dir["h"] = self._quality_control(self.wind_dir["h"], qc_flag)
+            qc_flag = self._datasets.variables["wvc_quality_flag"][rows]
+            self._apply_qc(qc_flag, qc)
 
-    @property
-    def attrs(self):
+    def _read_attrs(self):
         return {k: self._autodecode(v) for k, v in self._datasets.__dict__.items()}
 
-    @property
-    def platform_name(self):
-        return self.attrs['source'] + " Level 2"
-
-    @property
-    def resolution(self):
-        return self.attrs['pixel_size_on_horizontal'].upper()
-
-    @property
-    def start_time(self):
-        time = self.attrs['start_date']
-        time += " " + self.attrs['start_time']
-        return datetime.strptime(time, "%Y-%m-%d %H:%M:%S")
-
-    @property
-    def end_time(self):
-        time = self.attrs['stop_date']
-        time += " " + self.attrs['stop_time']
-        return datetime.strptime(time, "%Y-%m-%d %H:%M:%S")
+    def _build_metadata(self):
+        attrs = self.attrs
+        platform, _, sensor = attrs['source'].rpartition(" ")
+        start_time = attrs['start_date'] + " " + attrs['start_time']
+        end_time = attrs['stop_date'] + " " + attrs['stop_time']
+        return Metadata(
+            reader=self.__class__.__name__,
+            platform=platform,
+            sensor=sensor,
+            level="Level 2",
+            resolution=attrs['pixel_size_on_horizontal'].upper(),
+            start_time=datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S"),
+            end_time=datetime.strptime(end_time, "%Y-%m-%d %H:%M:%S"),
+        )
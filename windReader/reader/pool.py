@@ -0,0 +1,126 @@
+"""Shared LRU pool of open file handles"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import h5py
+import netCDF4
+
+
+def open_dataset(fname, engine='h5py'):
+    if engine == 'h5py':
+        return h5py.File(fname, "r")
+    elif engine == 'netcdf4':
+        return netCDF4.Dataset(fname, "r")
+    else:
+        raise ValueError("Engine name not matched.")
+
+
+class HandlePool(object):
+    """Bounded pool of open h5py/netCDF4 handles keyed by path and mtime.
+
+    Handles are reference counted: `acquire` reuses an open handle for hot
+    granules and `release` keeps it open until it is evicted as the least
+    recently used one. Handles still in use are never closed, so the pool
+    may grow over `maxsize` temporarily.
+    """
+
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        # key -> [handle, refcount]
+        self._handles = OrderedDict()
+        # id(handle) -> key, for release
+        self._keys = {}
+        # handles evicted or outdated while still in use
+        self._orphans = {}
+
+    @staticmethod
+    def _make_key(fname, engine):
+        path = os.path.abspath(fname)
+        return (path, os.stat(path).st_mtime_ns, engine)
+
+    def acquire(self, fname, engine='h5py'):
+        key = self._make_key(fname, engine)
+        with self._lock:
+            entry = self._handles.get(key)
+            if entry is not None:
+                entry[1] += 1
+                self._handles.move_to_end(key)
+                return entry[0]
+        handle = open_dataset(fname, engine)
+        with self._lock:
+            entry = self._handles.get(key)
+            if entry is not None:
+                # opened concurrently by another thread, use that one
+                handle.close()
+                entry[1] += 1
+                self._handles.move_to_end(key)
+                return entry[0]
+            # file was modified, drop the handles of older versions
+            for old_key in [k for k in self._handles if k[0] == key[0] and k[2] == engine]:
+                self._discard(old_key)
+            self._handles[key] = [handle, 1]
+            self._keys[id(handle)] = key
+            self._evict()
+        return handle
+
+    def release(self, handle):
+        with self._lock:
+            key = self._keys.get(id(handle))
+            if key is None:
+                # not managed by this pool
+                handle.close()
+                return
+            entry = self._handles.get(key)
+            if entry is not None and entry[0] is handle:
+                entry[1] = max(entry[1] - 1, 0)
+                self._evict()
+                return
+            orphan = self._orphans.get(id(handle))
+            if orphan is not None:
+                orphan[1] -= 1
+                if orphan[1] <= 0:
+                    del self._orphans[id(handle)]
+                    del self._keys[id(handle)]
+                    handle.close()
+
+    def _discard(self, key):
+        handle, refcount = self._handles.pop(key)
+        if refcount > 0:
+            self._orphans[id(handle)] = [handle, refcount]
+        else:
+            del self._keys[id(handle)]
+            handle.close()
+
+    def _evict(self):
+        if len(self._handles) <= self.maxsize:
+            return
+        for key in list(self._handles):
+            if len(self._handles) <= self.maxsize:
+                break
+            if self._handles[key][1] == 0:
+                self._discard(key)
+
+    def clear(self):
+        """Close all handles not in use"""
+        with self._lock:
+            for key in [k for k, v in self._handles.items() if v[1] == 0]:
+                self._discard(key)
+
+    def __len__(self):
+        return len(self._handles)
+
+
+_handle_pool = None
+
+
+def set_handle_pool(pool):
+    """Set shared handle pool used by all readers, `None` to disable"""
+    global _handle_pool
+    _handle_pool = pool
+
+
+def get_handle_pool():
+    return _handle_pool
@@ -0,0 +1,214 @@
+"""Multi-resolution swath pyramid.
+
+Level 0 is the native swath, each following level halves the number of
+rows and columns: u/v are vector averaged, the max wind speed of each
+block is retained and positions are averaged on the unit sphere. Every
+level is stored in its own file, so a wide-area render only reads the
+small coarse level it needs.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from windReader.reader.utils import to_datetime64
+
+MAX_LEVELS = 6
+# stop decimating when a level would have fewer rows/columns than this
+MIN_LEVEL_SIZE = 4
+
+
+def _coarsen(a, fill, reduce):
+    """Reduce 2x2 blocks of a 2-D array, padding odd sizes with fill"""
+    rows, cols = a.shape
+    pr, pc = rows % 2, cols % 2
+    if pr or pc:
+        a = np.pad(a, ((0, pr), (0, pc)), constant_values=fill)
+    a = a.reshape(a.shape[0] // 2, 2, a.shape[1] // 2, 2)
+    return reduce(a, axis=(1, 3))
+
+
+def _level_arrays(state):
+    """Averaged level arrays from block sums"""
+    x, y, z, ngeo = state["x"], state["y"], state["z"], state["ngeo"]
+    nwind, nt = state["nwind"], state["nt"]
+    geo_mask = ngeo == 0
+    wind_mask = nwind == 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        lat = np.rad2deg(np.arctan2(z, np.hypot(x, y)))
+        lon = np.rad2deg(np.arctan2(y, x))
+        u = state["u"] / nwind
+        v = state["v"] / nwind
+        t = state["t"] // np.maximum(nt, 1)
+    times = t.astype("datetime64[s]")
+    times[nt == 0] = np.datetime64("NaT")
+    return {
+        "latitude": np.ma.array(lat, mask=geo_mask),
+        "longitude": np.ma.array(lon, mask=geo_mask),
+        "wind_spd": np.ma.array(state["smax"], mask=wind_mask),
+        "u": np.ma.array(u, mask=wind_mask),
+        "v": np.ma.array(v, mask=wind_mask),
+        "times": times,
+    }
+
+
+class SwathPyramid(object):
+
+    def __init__(self, levels, native_km, resolution, band=None):
+        # list of level dicts, `None` for levels not read from disk yet
+        self.levels = levels
+        self.native_km = native_km
+        self.resolution = resolution
+        self.band = band
+        self._path = None
+
+    @classmethod
+    def from_reader(cls, reader, band=None, max_levels=MAX_LEVELS):
+        """Build pyramid from a loaded (uncropped) reader"""
+        lons, lats = reader.get_lonlats()
+        wind_speed, wind_dir = reader.get_values()
+        times = to_datetime64(reader.wvc_time, np.shape(wind_speed))
+
+        level0 = {
+            "latitude": lats,
+            "longitude": lons,
+            "wind_spd": wind_speed,
+            "u": wind_dir['v'],
+            "v": wind_dir['h'],
+            "times": times,
+        }
+        levels = [level0]
+        resolution = reader.resolution
+        try:
+            native_km = float(resolution.split()[0])
+        except (AttributeError, ValueError, IndexError):
+            native_km = 25.
+
+        if np.ndim(lats) != 2 or np.shape(lats) != np.shape(wind_speed):
+            # gridded products without 2-D geolocation only have level 0
+            return cls(levels, native_km, resolution, band)
+
+        lat = np.ma.getdata(lats).astype(np.float64)
+        lon = np.ma.getdata(lons).astype(np.float64)
+        geo_ok = ~np.ma.getmaskarray(lats) & ~np.ma.getmaskarray(lons) & np.isfinite(lat) & np.isfinite(lon)
+        spd = np.ma.getdata(wind_speed).astype(np.float64)
+        wind_ok = ~np.ma.getmaskarray(wind_speed) & geo_ok & np.isfinite(spd)
+        t = times.astype(np.int64)
+        t_ok = ~np.isnat(times) & geo_ok
+        rlat, rlon = np.deg2rad(lat), np.deg2rad(lon)
+        state = {
+            "x": np.where(geo_ok, np.cos(rlat) * np.cos(rlon), 0.),
+            "y": np.where(geo_ok, np.cos(rlat) * np.sin(rlon), 0.),
+            "z": np.where(geo_ok, np.sin(rlat), 0.),
+            "ngeo": geo_ok.astype(np.int64),
+            "u": np.where(wind_ok, np.ma.getdata(wind_dir['v']), 0.),
+            "v": np.where(wind_ok, np.ma.getdata(wind_dir['h']), 0.),
+            "nwind": wind_ok.astype(np.int64),
+            "smax": np.where(wind_ok, spd, -np.inf),
+            "t": np.where(t_ok, t, 0),
+            "nt": t_ok.astype(np.int64),
+        }
+        for _ in range(1, max_levels):
+            if min(state["x"].shape) < 2 * MIN_LEVEL_SIZE:
+                break
+            state = {
+                k: _coarsen(a, -np.inf, np.max) if k == "smax" else _coarsen(a, 0, np.sum)
+                for k, a in state.items()
+            }
+            levels.append(_level_arrays(state))
+        return cls(levels, native_km, resolution, band)
+
+    def level_km(self, level):
+        return self.native_km * 2**level
+
+    def choose_level(self, resolution_km=None):
+        """Coarsest level still finer than the output resolution (km)"""
+        if not resolution_km:
+            return 0
+        level = 0
+        for k in range(len(self.levels)):
+            if self.level_km(k) <= resolution_km:
+                level = k
+        return level
+
+    @staticmethod
+    def cache_path(cache_dir, key):
+        digest = hashlib.sha256(
+            json.dumps(key, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        return os.path.join(cache_dir, digest)
+
+    def save(self, cache_dir, key):
+        path = self.cache_path(cache_dir, key)
+        os.makedirs(path, exist_ok=True)
+        for k, level in enumerate(self.levels):
+            arrays = {}
+            for name, a in level.items():
+                if name == "times":
+                    arrays[name] = np.asarray(a).astype(np.int64)
+                else:
+                    arrays[name] = np.ma.getdata(a)
+                    arrays[name + "_mask"] = np.ma.getmaskarray(a)
+            tmp = os.path.join(path, f"level_{k}.{os.getpid()}.tmp.npz")
+            np.savez(tmp, **arrays)
+            os.replace(tmp, os.path.join(path, f"level_{k}.npz"))
+        meta = {
+            "levels": len(self.levels),
+            "native_km": self.native_km,
+            "resolution": self.resolution,
+            "band": self.band,
+            "key": key,
+        }
+        # meta is written last, its presence marks a complete pyramid
+        tmp = os.path.join(path, f"meta.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, "meta.json"))
+        self._path = path
+
+    @classmethod
+    def open(cls, cache_dir, key):
+        """Pyramid stored for the granule key, levels are read lazily.
+        `None` if not cached."""
+        path = cls.cache_path(cache_dir, key)
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        pyramid = cls(
+            [None] * meta["levels"], meta["native_km"], meta["resolution"], meta["band"]
+        )
+        pyramid._path = path
+        return pyramid
+
+    def load_level(self, level):
+        if self.levels[level] is None:
+            with np.load(os.path.join(self._path, f"level_{level}.npz")) as data:
+                arrays = {}
+                for name in ("latitude", "longitude", "wind_spd", "u", "v"):
+                    arrays[name] = np.ma.array(data[name], mask=data[name + "_mask"])
+                arrays["times"] = data["times"].astype("datetime64[s]")
+            self.levels[level] = arrays
+        return self.levels[level]
+
+    def apply(self, reader, level):
+        """Set reader data to the pyramid level given"""
+        arrays = self.load_level(level)
+        reader.latitude = arrays["latitude"].copy()
+        reader.longitude = arrays["longitude"].copy()
+        reader.wind_spd = arrays["wind_spd"].copy()
+        reader.wind_dir = {'v': arrays["u"].copy(), 'h': arrays["v"].copy()}
+        times = arrays["times"]
+        if times.ndim == 2 and np.all(times == times[:, :1]):
+            # row times, keep the 1-D layout of the readers
+            times = times[:, 0]
+        reader.wvc_time = times.astype(object)
+        # quality flags of the native swath do not apply to this level
+        reader._reset_qc()
+        if level == 0:
+            reader._resolution = self.resolution
+        else:
+            reader._resolution = f"{self.level_km(level):.1f} KM"
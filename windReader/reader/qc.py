@@ -0,0 +1,77 @@
+"""Quality control policies on wind vector cell quality flags"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+def bitmask(*bits):
+    """Integer with the bit positions given set"""
+    out = 0
+    for bit in bits:
+        out |= 1 << bit
+    return out
+
+
+@dataclass(frozen=True)
+class QCPolicy:
+    """Cells are rejected when any checked bit, other than the allowed
+    ones, is set in their quality flag"""
+
+    name: str
+    # bits of the flag that are checked
+    check: int
+    # checked bits that do not reject a cell
+    allowed: int = 0
+
+    def mask(self, qc_flag):
+        """Boolean mask of rejected cells, in one vectorized pass"""
+        flag = np.ma.getdata(qc_flag).astype(np.int64)
+        return (flag & (self.check & ~self.allowed)) != 0
+
+    def to_dict(self):
+        return {"name": self.name, "check": self.check, "allowed": self.allowed}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Policy from config, bits given as integer mask or list of bit
+        positions"""
+        def _bits(value):
+            return bitmask(*value) if isinstance(value, (list, tuple)) else int(value)
+        return cls(
+            name=data.get("name", "custom"),
+            check=_bits(data["check"]),
+            allowed=_bits(data.get("allowed", 0)),
+        )
+
+
+def resolve_policy(policies, qc):
+    """QCPolicy for `qc` given to `load`: `True` for the default policy,
+    a policy name, a dict (see `QCPolicy.from_dict`) or a QCPolicy.
+    `None` if quality control is disabled."""
+    if qc is None or qc is False:
+        return None
+    if qc is True:
+        return policies["default"]
+    if isinstance(qc, QCPolicy):
+        return qc
+    if isinstance(qc, dict):
+        return QCPolicy.from_dict(qc)
+    if isinstance(qc, str):
+        try:
+            return policies[qc]
+        except KeyError:
+            raise ValueError(
+                f"QC policy {qc} not found, available: {', '.join(policies)}."
+            )
+    raise ValueError(f"QC policy {qc!r} not supported.")
+
+
+def policy_from_config(config):
+    """`qc` argument of `load` from the "use_quality_control" and
+    "qc_policy" keys of a script config. "qc_policy" is a named policy of
+    the reader or {"check": [bits], "allowed": [bits]}."""
+    quality_control = config.get("use_quality_control", True)
+    if quality_control and config.get("qc_policy", None):
+        return config["qc_policy"]
+    return quality_control
@@ -0,0 +1,50 @@
+"""Helpers shared by readers and caches"""
+
+import os
+
+import numpy as np
+
+
+def granule_key(fname, band=None, qc=True):
+    """Identity of a granule as loaded, changes when the file changes"""
+    stat = os.stat(fname)
+    return {
+        "path": os.path.abspath(fname),
+        "mtime": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "band": band,
+        # QCPolicy objects are stored by their definition
+        "qc": qc.to_dict() if hasattr(qc, "to_dict") else qc,
+    }
+
+
+def to_datetime64(times, shape=None):
+    """Object array of datetime (or None) to datetime64[s], optionally
+    broadcast from row times to the 2-D cell shape given"""
+    times = np.asarray(times)
+    if times.dtype == object:
+        out = np.array(
+            [np.datetime64(t, "s") if t is not None else np.datetime64("NaT")
+             for t in times.ravel()],
+            dtype="datetime64[s]",
+        ).reshape(times.shape)
+    else:
+        out = times.astype("datetime64[s]")
+    if shape is not None and out.shape != tuple(shape):
+        out = np.broadcast_to(out.reshape(out.shape + (1,) * (len(shape) - out.ndim)), shape)
+    return out
+
+
+def parse_times(strings):
+    """ISO 8601 strings to datetime64[s], NaT for blank or invalid ones"""
+    strings = np.asarray(strings, dtype=str)
+    try:
+        return strings.astype("datetime64[s]")
+    except ValueError:
+        out = np.full(strings.shape, np.datetime64("NaT"), dtype="datetime64[s]")
+        for idx, s in np.ndenumerate(strings):
+            try:
+                out[idx] = np.datetime64(s, "s")
+            except ValueError:
+                pass
+        return out
@@ -1,19 +1,35 @@
 """Base reader for Satellite Wind Data"""
 
-import h5py
-import netCDF4
 import numpy as np
-from functools import lru_cache
+from windReader.reader.pool import open_dataset, get_handle_pool
+from windReader.reader.compact import CompactSwath
+from windReader.reader.pyramid import SwathPyramid
+from windReader.reader.qc import resolve_policy
+from windReader.reader.utils import granule_key
 
 class WIND_BASE(object):
 
+    WIND_DATASETS_ID = None
+    # named quality control policies, "default" is used for `qc=True`
+    QC_POLICIES = {}
+
     def __init__(self, fname, engine='h5py'):
-        if engine == 'h5py':
-            self._datasets = h5py.File(fname, "r")
-        elif engine == 'netcdf4':
-            self._datasets = netCDF4.Dataset(fname, "r")
+        self.fname = fname
+        self._attrs = None
+        # set when the data loaded has a resolution other than the file's
+        self._resolution = None
+        self._pool = get_handle_pool()
+        if self._pool is not None:
+            self._datasets = self._pool.acquire(fname, engine)
         else:
-            raise ValueError("Engine name not matched.")
+            self._datasets = open_dataset(fname, engine)
+
+        try:
+            self._check_datasets()
+            self.metadata = self._build_metadata()
+        except Exception:
+            self.close()
+            raise
 
         self.wvc_time = None
         self.latitude = None
@@ -22,14 +38,52 @@ class WIND_BASE(object):
         self.wind_spd = None
         self.wind_dir = {'v': None, 'h': None}
 
-        self.WIND_DATASETS_ID = None
+        # position of the data in the swath as loaded, moved by `crop`
+        self._offset = (0, 0)
+        self._compact = None
+        self._sampler = None
+        self._indices = None
+        # quality flags and data before quality control, for switching
+        # policies without reading the file again
+        self._qc_flag = None
+        self._qc_raw = None
+        self._qc_masks = {}
+        self.qc_policy = None
+
+    def _check_datasets(self):
+        """Raise ValueError if the file does not belong to this reader"""
+        pass
+
+    def close(self):
+        """Close the file, or give it back to the shared handle pool"""
+        if self._datasets is None:
+            return
+        if self._pool is not None:
+            self._pool.release(self._datasets)
+        else:
+            self._datasets.close()
+        self._datasets = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
     @staticmethod
     def _autodecode():
         return NotImplemented
 
-    @lru_cache(maxsize=2)
     def _get_indices(self, georange):
+        # cached per georange until latitude is loaded again or cropped
+        if self._indices is None or self._indices[0] is not self.latitude:
+            self._indices = (self.latitude, {})
+        cache = self._indices[1]
+        if georange not in cache:
+            cache[georange] = self._find_indices(georange)
+        return cache[georange]
+
+    def _find_indices(self, georange):
         latmin, latmax, lonmin, lonmax = georange
         barr = (
             (self.latitude >= latmin)
@@ -48,25 +102,110 @@ class WIND_BASE(object):
     def load(self):
         return NotImplemented
 
+    def _row_times(self):
+        """datetime64[s] time of each along-track row"""
+        return NotImplemented
+
+    def _time_rows(self, time_window=None):
+        """Slice of the rows observed within time_window (t0, t1), read
+        from the row time variable only. Sets the row offset of the data."""
+        self._offset = (0, 0)
+        if time_window is None:
+            return slice(None)
+        t0, t1 = (np.datetime64(t, "s") for t in time_window)
+        times = self._row_times()
+        rows = np.nonzero((times >= t0) & (times <= t1))[0]
+        if not len(rows):
+            raise ValueError("No data within the time window given.")
+        self._offset = (int(rows[0]), 0)
+        return slice(int(rows[0]), int(rows[-1]) + 1)
+
+    def _reset_qc(self):
+        """Drop quality flags of earlier loads, called before reading"""
+        self._qc_flag = None
+        self._qc_raw = None
+        self._qc_masks = {}
+        self.qc_policy = None
+
+    def _apply_qc(self, qc_flag, qc):
+        """Mask wind data by the quality control policy given"""
+        policy = resolve_policy(self.QC_POLICIES, qc)
+        if qc_flag is not self._qc_flag:
+            self._qc_flag = qc_flag
+            self._qc_raw = (self.wind_spd, self.wind_dir['v'], self.wind_dir['h'])
+            self._qc_masks = {}
+        if policy is None:
+            mask = np.ma.nomask
+        else:
+            # one mask per policy, shared by all fields
+            if policy not in self._qc_masks:
+                self._qc_masks[policy] = policy.mask(qc_flag)
+            mask = self._qc_masks[policy]
+        spd, v, h = (
+            np.ma.array(data, mask=mask, fill_value=np.ma.array(data).fill_value)
+            for data in self._qc_raw
+        )
+        self.wind_spd = spd
+        self.wind_dir = {'v': v, 'h': h}
+        self.qc_policy = policy
+
+    def set_qc_policy(self, qc):
+        """Switch quality control policy of the loaded data, the quality
+        flags are not read again"""
+        if self._qc_flag is None:
+            raise ValueError(
+                "Quality flags are empty. "
+                "You should run `load` with quality control first."
+            )
+        self._apply_qc(self._qc_flag, qc)
+
+    def load_pyramid(self, cache_dir, resolution_km=None, band=None, qc=True):
+        """Load the coarsest pyramid level still finer than resolution_km.
+        The pyramid is built and stored in cache_dir on first use, later
+        calls only read the level chosen. Returns the level."""
+        key = granule_key(self.fname, band, qc)
+        pyramid = SwathPyramid.open(cache_dir, key)
+        if pyramid is None:
+            if self.WIND_DATASETS_ID:
+                self.load(band, qc=qc)
+            else:
+                self.load(qc=qc)
+            pyramid = SwathPyramid.from_reader(self, band)
+            pyramid.save(cache_dir, key)
+        level = pyramid.choose_level(resolution_km)
+        pyramid.apply(self, level)
+        return level
+
+    def _read_attrs(self):
+        return NotImplemented
+
+    def _build_metadata(self):
+        return NotImplemented
+
     @property
     def attrs(self):
-        return NotImplemented
+        # global attributes are read and decoded only once
+        if self._attrs is None:
+            self._attrs = self._read_attrs()
+        return self._attrs
 
     @property
     def platform_name(self):
-        return NotImplemented
+        return self.metadata.platform_name
 
     @property
     def resolution(self):
-        return NotImplemented
+        if self._resolution is not None:
+            return self._resolution
+        return self.metadata.resolution
 
     @property
     def start_time(self):
-        return NotImplemented
+        return self.metadata.start_time
 
     @property
     def end_time(self):
-        return NotImplemented
+        return self.metadata.end_time
 
     def crop(self, ll_box):
         if self.longitude is None or self.latitude is None or self.wind_spd is None:
@@ -77,6 +216,13 @@ class WIND_BASE(object):
         if not ll_box:
             raise ValueError("crop must be given ll_box value.")
         yi, yj, xi, xj = self._get_indices(ll_box)
+        self._offset = (self._offset[0] + yi, self._offset[1] + xi)
+        if self._qc_flag is not None:
+            self._qc_flag = self._qc_flag[yi:yj, xi:xj]
+            self._qc_raw = tuple(data[yi:yj, xi:xj] for data in self._qc_raw)
+            self._qc_masks = {
+                policy: mask[yi:yj, xi:xj] for policy, mask in self._qc_masks.items()
+            }
         self.wind_spd = self.wind_spd[yi:yj, xi:xj]
         self.wind_dir['v'] = self.wind_dir['v'][yi:yj, xi:xj]
         self.wind_dir['h'] = self.wind_dir['h'][yi:yj, xi:xj]
@@ -132,3 +278,20 @@ class WIND_BASE(object):
     def get_values(self):
         return self.wind_spd, self.wind_dir
 
+    def compact(self):
+        """Valid cells as `CompactSwath`, built once until data changes"""
+        if self.wind_spd is None:
+            raise ValueError("Data is empty. You should run `load` first.")
+        if self._compact is None or self._compact[0] is not self.wind_spd:
+            self._compact = (self.wind_spd, CompactSwath.from_reader(self))
+        return self._compact[1]
+
+    def sample_points(self, lats, lons, times=None, **kwargs):
+        """Winds at point observations, see `PointSampler.sample`.
+        The spatial index is built once and reused until data changes."""
+        from windReader.analysis.sampling import PointSampler
+        if self.wind_spd is None:
+            raise ValueError("Data is empty. You should run `load` first.")
+        if self._sampler is None or self._sampler[0] is not self.wind_spd:
+            self._sampler = (self.wind_spd, PointSampler(self))
+        return self._sampler[1].sample(lats, lons, times, **kwargs)
@@ -1,43 +1,34 @@
 import numpy as np
 from datetime import datetime, timedelta
 from windReader.reader.wind_base import WIND_BASE
+from windReader.reader.metadata import Metadata
+from windReader.reader.qc import QCPolicy, bitmask
 
 class WindRAD(WIND_BASE):
 
+    WIND_DATASETS_ID = ['C_band', 'Dual_band', 'Ku_band', 'Ku_band_10km']
+    WIND_DATASETS_NAME = ['C Band', 'Dual Band', 'Ku Band', 'Ku Band']
+    QC_POLICIES = {
+        "default": QCPolicy("default", check=(1 << 17) - 1),
+        # bit 2 and bit 3 may be falsely reported as QC flags
+        "ignore_bits_2_3": QCPolicy(
+            "ignore_bits_2_3", check=(1 << 17) - 1, allowed=bitmask(2, 3)
+        ),
+    }
+
     def __init__(self, fname):
         super(WindRAD, self).__init__(fname, engine='h5py')
-        if not self.attrs["Sensor Name"] == "WindRAD":
-            raise ValueError("Satellite not matched")
         self.dataset_id = None
         self.dataset_type = None
-        self.WIND_DATASETS_ID = ['C_band', 'Dual_band', 'Ku_band', 'Ku_band_10km']
-        self.WIND_DATASETS_NAME = ['C Band', 'Dual Band', 'Ku Band', 'Ku Band']
+
+    def _check_datasets(self):
+        if not self.attrs["Sensor Name"] == "WindRAD":
+            raise ValueError("Satellite not matched")
 
     @staticmethod
     def _autodecode(string, encoding="utf-8"):
         return string.decode(encoding) if isinstance(string, bytes) else string
 
-    def _quality_control(self, data, qc_flag):
-        bitmask = (1 << 17) - 1
-        truncated = qc_flag & bitmask
-        return np.ma.array(
-            data,
-            mask=truncated,
-            dtype=data.dtype,
-            fill_value=data.fill_value
-        )
-        # Bit 2 and Bit 3 may be falsely reported as QC flags,
-        # use the code below if you need.
-        # allowed_codes = np.array([1 << 2, 1 << 3], dtype=np.int64)
-        # allowed_mask = int(np.bitwise_or.reduce(allowed_codes))
-        # keep = (truncated & allowed_mask) == truncated
-        # return np.ma.array(
-        #     data,
-        #     mask=(~keep),
-        #     dtype=data.dtype,
-        #     fill_value=data.fill_value
-        # )
-
     def _calc_wvc_time(self, day_count, day_slope, day_intercept,
                              ms_count, ms_slope, ms_intercept):
         # mask invalid values
@@ -80,51 +71,100 @@ class WindRAD(WIND_BASE):
         h = spd * np.cos(np.deg2rad(dir))
         return {'v': v, 'h': h}
 
-    def load(self, band_id, qc=True):
+    def _row_times(self):
+        if self.dataset_type == "GLL":
+            raise ValueError("Time window not supported for daily data.")
+        group = self._datasets[self.dataset_id]
+        day_count = np.asarray(group["day_count"][:], dtype=np.float64)
+        ms_count = np.asarray(group["millisecond_count"][:], dtype=np.float64)
+        ms_slope = group["millisecond_count"].attrs["Slope"]
+        ms_slope = np.where(ms_slope == 0, 1, ms_slope)
+        invalid = (day_count == 65535) | (ms_count == 4294967295)
+        # same as `_calc_wvc_time`, day slope forced to 1
+        seconds = (
+            (day_count + group["day_count"].attrs["Intercept"]) * 86400
+            + (ms_count * ms_slope + group["millisecond_count"].attrs["Intercept"]) * 1e-3
+        )
+        seconds = np.where(invalid, 0, seconds).reshape(len(seconds), -1)[:, 0]
+        times = np.datetime64("2000-01-01T12:00:00", "s") + seconds.astype(
+            "timedelta64[s]"
+        )
+        times[invalid.reshape(len(invalid), -1)[:, 0]] = np.datetime64("NaT")
+        return times
+
+    def load(self, band_id, qc=True, time_window=None):
         if band_id not in self.WIND_DATASETS_ID:
             raise ValueError("Band ID not matched")
         self.dataset_id = band_id
         self.dataset_type = self.attrs["Projection Type"]
+        rows = self._time_rows(time_window)
+        self._reset_qc()
+        if self.dataset_type == "GLL":
+            self._resolution = "25.0 KM (Daily)"
+        else:
+            data_shape = self._datasets[self.dataset_id]["day_count"].shape
+            self._resolution = "10.0 KM" if data_shape[0] == 2201 else "20.0 KM"
         self.wvc_time = self._calc_wvc_time(
-            self._datasets[self.dataset_id]["day_count"][:],
+            self._datasets[self.dataset_id]["day_count"][rows],
             self._datasets[self.dataset_id]["day_count"].attrs["Slope"],
             self._datasets[self.dataset_id]["day_count"].attrs["Intercept"],
-            self._datasets[self.dataset_id]["millisecond_count"][:],
+            self._datasets[self.dataset_id]["millisecond_count"][rows],
             self._datasets[self.dataset_id]["millisecond_count"].attrs["Slope"],
             self._datasets[self.dataset_id]["millisecond_count"].attrs["Intercept"],
         )
         self.wind_spd = self._calc_wind_spd(
-            self._datasets[self.dataset_id]["wind_speed_selected"][:],
+            self._datasets[self.dataset_id]["wind_speed_selected"][rows],
             self._datasets[self.dataset_id]["wind_speed_selected"].attrs["Slope"],
             self._datasets[self.dataset_id]["wind_speed_selected"].attrs["Intercept"]
         )
         self.wind_dir = self._calc_wind_dir(
             self.wind_spd,
-            self._datasets[self.dataset_id]["wind_dir_selected"][:],
+            self._datasets[self.dataset_id]["wind_dir_selected"][rows],
             self._datasets[self.dataset_id]["wind_dir_selected"].attrs["Slope"],
             self._datasets[self.dataset_id]["wind_dir_selected"].attrs["Intercept"],
         )
         if self.dataset_type == "GLL":
             # WindRAD daily data (POAD)
-            self.latitude = self._datasets[self.dataset_id]["grid_lat"][:]
-            self.longitude = self._datasets[self.dataset_id]["grid_lon"][:]
+            self.latitude = self._datasets[self.dataset_id]["grid_lat"][rows]
+            self.longitude = self._datasets[self.dataset_id]["grid_lon"][rows]
         else:
-            self.latitude = self._datasets[self.dataset_id]["wvc_lat"][:]
-            self.longitude = self._datasets[self.dataset_id]["wvc_lon"][:]
+            self.latitude = self._datasets[self.dataset_id]["wvc_lat"][rows]
+            self.longitude = self._datasets[self.dataset_id]["wvc_lon"][rows]
         if qc and self.dataset_type != "GLL":
             # quality control by qc flags
-            qc_flag = self._datasets[self.dataset_id]["wvc_quality_flag"][:]
-            self.wind_spd = self._quality_control(self.wind_spd, qc_flag)
-            self.wind_dir["v"] = self._quality_control(self.wind_dir["v"], qc_flag)
-            self.wind_dir["h"] = self._quality_control(self.wind_dir["h"], qc_flag)
+            qc_flag = self._datasets[self.dataset_id]["wvc_quality_flag"][rows]
+            self._apply_qc(qc_flag, qc)
 
-    @property
-    def attrs(self):
+    def load_pyramid(self, cache_dir, resolution_km=None, band_id=None, qc=True):
+        if band_id not in self.WIND_DATASETS_ID:
+            raise ValueError("Band ID not matched")
+        level = super(WindRAD, self).load_pyramid(cache_dir, resolution_km, band_id, qc)
+        self.dataset_id = band_id
+        self.dataset_type = self.attrs["Projection Type"]
+        return level
+
+    def _read_attrs(self):
         return {k: self._autodecode(v) for k, v in self._datasets.attrs.items()}
 
+    def _build_metadata(self):
+        attrs = self.attrs
+        start_time = attrs['Observing Beginning Date'] + " " + attrs['Observing Beginning Time']
+        end_time = attrs['Observing Ending Date'] + " " + attrs['Observing Ending Time']
+        return Metadata(
+            reader=self.__class__.__name__,
+            platform=attrs['Satellite Name'],
+            sensor=attrs['Sensor Name'],
+            level="Level 2",
+            # resolution depends on the band, only known for daily data
+            resolution="25.0 KM (Daily)" if attrs.get("Projection Type") == "GLL" else None,
+            start_time=datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S.%f"),
+            end_time=datetime.strptime(end_time, "%Y-%m-%d %H:%M:%S.%f"),
+            bands=tuple(self.WIND_DATASETS_ID),
+        )
+
     @property
     def platform_name(self):
-        platform = self.attrs['Satellite Name'] + " " + self.attrs['Sensor Name'] + " Level 2"
+        platform = self.metadata.platform_name
         if self.dataset_id:
             _dataset_name = self.WIND_DATASETS_NAME[
                 self.WIND_DATASETS_ID.index(self.dataset_id)
@@ -132,20 +172,3 @@ class WindRAD(WIND_BASE):
             return platform + " " + _dataset_name
         else:
             return platform
-
-    @property
-    def resolution(self):
-        if self.dataset_type and self.dataset_type == "GLL":
-            return "25.0 KM (Daily)"
-        data_shape = self._datasets[self.dataset_id]["day_count"].shape
-        return "10.0 KM" if data_shape[0] == 2201 else "20.0 KM"
-
-    @property
-    def start_time(self):
-        time = self.attrs['Observing Beginning Date'] + " " + self.attrs['Observing Beginning Time']
-        return datetime.strptime(time, "%Y-%m-%d %H:%M:%S.%f")
-
-    @property
-    def end_time(self):
-        time = self.attrs['Observing Ending Date'] + " " + self.attrs['Observing Ending Time']
-        return datetime.strptime(time, "%Y-%m-%d %H:%M:%S.%f")
@@ -0,0 +1 @@
+from .raster import rasterize, render_preview
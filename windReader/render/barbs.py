@@ -0,0 +1,216 @@
+"""Vectorized wind barbs.
+
+Same look as matplotlib's `Barbs`, but the polygon vertices of all barbs
+are built with batched NumPy operations: one template per speed class
+(number of flags, full and half barbs) which is then flipped and rotated
+for every vector at once. The result is a single `PathCollection`.
+"""
+
+import numpy as np
+from matplotlib import cbook
+from matplotlib import transforms
+from matplotlib.collections import PathCollection
+from matplotlib.patches import CirclePolygon
+from matplotlib.path import Path
+
+
+def find_tails(mag, rounding=True, half=5, full=10, flag=50):
+    """Number of flags and full barbs, and whether a half barb is needed
+    or nothing is drawn, for each magnitude"""
+    if rounding:
+        mag = half * np.around(mag / half)
+    n_flags, mag = divmod(mag, flag)
+    n_barb, mag = divmod(mag, full)
+    half_flag = mag >= half
+    empty_flag = ~(half_flag | (n_flags > 0) | (n_barb > 0))
+    return n_flags.astype(int), n_barb.astype(int), half_flag, empty_flag
+
+
+def _barb_template(nflags, nbarbs, half_barb, length, endy, spacing,
+                   full_height, full_width):
+    """Unrotated, unflipped vertices of one speed class"""
+    endx = 0.0
+    poly_verts = [(endx, endy)]
+    offset = length
+    barb_height = full_height
+
+    for i in range(nflags):
+        # the spacing that works for the barbs is a little to much for
+        # the flags, but this only occurs when we have more than 1 flag.
+        if offset != length:
+            offset += spacing / 2.
+        poly_verts.extend(
+            [(endx, endy + offset),
+             (endx + barb_height, endy - full_width / 2 + offset),
+             (endx, endy - full_width + offset)])
+        offset -= full_width + spacing
+
+    for i in range(nbarbs):
+        poly_verts.extend(
+            [(endx, endy + offset),
+             (endx + barb_height, endy + offset + full_width / 2),
+             (endx, endy + offset)])
+        offset -= spacing
+
+    if half_barb:
+        # a half barb first on the staff is offset from the end
+        if offset == length:
+            poly_verts.append((endx, endy + offset))
+            offset -= 1.5 * spacing
+        poly_verts.extend(
+            [(endx, endy + offset),
+             (endx + barb_height / 2, endy + offset + full_width / 4),
+             (endx, endy + offset)])
+    return np.asarray(poly_verts, dtype=np.float64)
+
+
+def _barb_classes(u, v, flip=False, length=7, pivot='tip', sizes=None,
+                  fill_empty=False, rounding=True, barb_increments=None):
+    """Rotated polygon vertices of barbs grouped by speed class.
+
+    Returns a list of (indices, verts) with verts of shape (n, K, 2) in
+    points, K being the number of vertices of that class.
+    """
+    sizes = sizes or dict()
+    barb_increments = barb_increments or dict()
+    u = np.asarray(u, dtype=np.float64).ravel()
+    v = np.asarray(v, dtype=np.float64).ravel()
+    flip = np.broadcast_to(np.asarray(flip, dtype=bool), u.shape)
+    if u.size == 0:
+        return []
+
+    spacing = length * sizes.get('spacing', 0.125)
+    full_height = length * sizes.get('height', 0.4)
+    full_width = length * sizes.get('width', 0.25)
+    empty_rad = length * sizes.get('emptybarb', 0.15)
+
+    pivot_points = dict(tip=0.0, middle=-length / 2.)
+    try:
+        endy = float(pivot)
+    except ValueError:
+        endy = pivot_points[pivot.lower()]
+
+    circ = CirclePolygon((0, 0), radius=empty_rad).get_verts()
+    if fill_empty:
+        empty_barb = circ
+    else:
+        # degenerate polygon that wraps back over itself
+        empty_barb = np.concatenate((circ, circ[::-1]))
+
+    nflags, nbarbs, halves, empty = find_tails(
+        np.hypot(u, v), rounding, **barb_increments
+    )
+    classes = np.stack(
+        [nflags, nbarbs, halves.astype(int), empty.astype(int)], axis=-1
+    )
+    uniq, inverse = np.unique(classes, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.searchsorted(inverse[order], np.arange(len(uniq) + 1))
+
+    out = []
+    for k, (nf, nb, hb, em) in enumerate(uniq):
+        idx = order[bounds[k]:bounds[k + 1]]
+        if em:
+            # empty barbs are neither flipped nor rotated
+            out.append((idx, np.broadcast_to(empty_barb, (len(idx),) + empty_barb.shape)))
+            continue
+        template = _barb_template(
+            nf, nb, hb, length, endy, spacing, full_height, full_width
+        )
+        sign = np.where(flip[idx], -1., 1.)[:, None]
+        theta = np.arctan2(v[idx], u[idx]) + np.pi / 2
+        cos, sin = np.cos(theta)[:, None], np.sin(theta)[:, None]
+        x = template[None, :, 0] * sign
+        y = template[None, :, 1]
+        out.append((idx, np.stack([x * cos - y * sin, x * sin + y * cos], axis=-1)))
+    return out
+
+
+def barb_vertices(u, v, flip=False, length=7, pivot='tip', sizes=None,
+                  fill_empty=False, rounding=True, barb_increments=None):
+    """Polygon vertices of each barb in points, like `Barbs._make_barbs`"""
+    verts = [None] * np.size(u)
+    for idx, class_verts in _barb_classes(
+        u, v, flip, length, pivot, sizes, fill_empty, rounding, barb_increments
+    ):
+        for i, xy in zip(idx.tolist(), class_verts):
+            verts[i] = xy
+    return verts
+
+
+def barbs(ax, x, y, u, v, c=None, pivot='tip', length=7, barbcolor=None,
+          flagcolor=None, sizes=None, fill_empty=False, barb_increments=None,
+          rounding=True, flip_barb=False, transform=None, **kwargs):
+    """Drop-in replacement of `ax.barbs(x, y, u, v, c, ...)`.
+
+    Works on plain Axes and cartopy GeoAxes (vectors are transformed to the
+    map projection like `GeoAxes.barbs` does). Returns the PathCollection.
+    """
+    if None in (barbcolor, flagcolor):
+        kwargs['edgecolors'] = 'face'
+        if flagcolor:
+            kwargs['facecolors'] = flagcolor
+        elif barbcolor:
+            kwargs['facecolors'] = barbcolor
+        else:
+            kwargs.setdefault('facecolors', 'k')
+    else:
+        kwargs['edgecolors'] = barbcolor
+        kwargs['facecolors'] = flagcolor
+    if 'linewidth' not in kwargs and 'lw' not in kwargs:
+        kwargs['linewidth'] = 1
+
+    x = np.ma.ravel(x)
+    y = np.ma.ravel(y)
+    u = np.ma.masked_invalid(u, copy=True).ravel()
+    v = np.ma.masked_invalid(v, copy=True).ravel()
+    flip = np.atleast_1d(flip_barb)
+    flip = np.broadcast_to(flip, u.shape) if flip.size == 1 else flip.ravel()
+    arrays = [x, y, u, v]
+    if c is not None:
+        arrays.append(np.ma.masked_invalid(c, copy=True).ravel())
+    arrays = cbook.delete_masked_points(*arrays, flip)
+    x, y, u, v = (np.asarray(a, dtype=np.float64) for a in arrays[:4])
+    c, flip = (arrays[4], arrays[5]) if c is not None else (None, arrays[4])
+
+    if transform is None:
+        transform = getattr(ax, 'projection', None) or ax.transData
+    if hasattr(ax, 'projection') and hasattr(transform, '_as_mpl_transform'):
+        # cartopy CRS, rotate vectors into the map projection
+        if transform != ax.projection:
+            u, v = ax.projection.transform_vectors(transform, x, y, u, v)
+            valid = np.isfinite(u) & np.isfinite(v)
+            x, y, u, v, flip = x[valid], y[valid], u[valid], v[valid], flip[valid]
+            if c is not None:
+                c = c[valid]
+        transform = transform._as_mpl_transform(ax)
+
+    # closed paths, built with one set of codes per speed class
+    paths = [None] * len(u)
+    for idx, verts in _barb_classes(
+        u, v, flip, length=length, pivot=pivot, sizes=sizes,
+        fill_empty=fill_empty, rounding=rounding,
+        barb_increments=barb_increments,
+    ):
+        verts = np.concatenate((verts, verts[:, :1]), axis=1)
+        codes = np.full(verts.shape[1], Path.LINETO, dtype=Path.code_type)
+        codes[0] = Path.MOVETO
+        codes[-1] = Path.CLOSEPOLY
+        for i, xy in zip(idx.tolist(), verts):
+            paths[i] = Path(xy, codes)
+
+    barb_size = length ** 2 / 4  # same as matplotlib Barbs
+    collection = PathCollection(
+        paths,
+        sizes=(barb_size,),
+        offsets=np.column_stack((x, y)),
+        offset_transform=transform,
+        **kwargs
+    )
+    collection.set_transform(transforms.IdentityTransform())
+    if c is not None:
+        collection.set_array(np.asarray(c))
+    ax.add_collection(collection, autolim=True)
+    ax.autoscale_view()
+    return collection
@@ -0,0 +1,43 @@
+"""Content-addressed on-disk store of rendered images"""
+
+import hashlib
+import json
+import os
+
+
+def content_key(data):
+    """Hash of a JSON-serializable description of everything that
+    determines an image"""
+    text = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ImageCache(object):
+    """Images stored under their content key, spread over two directory
+    levels. Files are written to a temporary name and renamed, so readers
+    never see partial images."""
+
+    def __init__(self, cache_dir, ext=".png"):
+        self.cache_dir = cache_dir
+        self.ext = ext
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key[2:4], key + self.ext)
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def get(self, key):
+        try:
+            with open(self.path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
@@ -0,0 +1,195 @@
+"""Fast raster preview of wind speed without matplotlib barbs"""
+
+from functools import lru_cache
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from windReader.colormap import colormap as cm
+
+# max splat radius in pixels, avoids huge footprints for tiny georanges
+MAX_SPLAT_RADIUS = 32
+
+
+@lru_cache(maxsize=8)
+def lookup_table(name="wind", n=256):
+    """RGBA lookup table (uint8) of colormap given, with its vmin and vmax"""
+    cmap, vmin, vmax = cm.get_colormap(name)
+    lut = (cmap(np.linspace(0, 1, n)) * 255).round().astype(np.uint8)
+    return lut, vmin, vmax
+
+
+def lonlat_to_pixel(lons, lats, georange, width, height):
+    """Map longitude/latitude to pixel coordinates of equirectangular grid"""
+    latmin, latmax, lonmin, lonmax = georange
+    lons = (np.asarray(lons, dtype=np.float64) - lonmin) % 360 + lonmin
+    x = (lons - lonmin) / (lonmax - lonmin) * width
+    y = (latmax - np.asarray(lats, dtype=np.float64)) / (latmax - latmin) * height
+    return x, y
+
+
+def _cell_spacing(x, y):
+    """Median distance in pixels between neighbouring cells of a swath"""
+    if x.ndim != 2:
+        return 1.
+    spacing = []
+    for axis in (0, 1):
+        if x.shape[axis] < 2:
+            continue
+        d = np.hypot(np.diff(x, axis=axis), np.diff(y, axis=axis))
+        d = d[np.isfinite(d)]
+        if d.size:
+            spacing.append(np.median(d))
+    return float(min(spacing)) if spacing else 1.
+
+
+def _splat(img, x, y, colors, radius):
+    """Nearest-neighbour splat of cells onto image, nearest cell wins"""
+    height, width = img.shape[:2]
+    r = int(np.ceil(radius))
+    oy, ox = np.mgrid[-r:r + 1, -r:r + 1]
+    keep = (ox**2 + oy**2) <= radius**2
+    ox, oy = ox[keep], oy[keep]
+    cx, cy = np.floor(x).astype(np.int64), np.floor(y).astype(np.int64)
+    px = cx[:, None] + ox[None, :]
+    py = cy[:, None] + oy[None, :]
+    # distance from pixel centre to cell centre
+    d2 = (px + 0.5 - x[:, None])**2 + (py + 0.5 - y[:, None])**2
+    inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+    cell = np.broadcast_to(np.arange(x.size)[:, None], px.shape)
+    px, py, d2, cell = px[inside], py[inside], d2[inside], cell[inside]
+    # later writes win in fancy assignment, so write farthest first;
+    # quantized distances let numpy use radix sort
+    d2 = np.minimum(d2 * 16, 65535).astype(np.uint16)
+    order = np.argsort(65535 - d2, kind="stable")
+    img[py[order], px[order]] = colors[cell[order]]
+
+
+def _draw_lines(img, x0, y0, x1, y1, color):
+    """Draw straight segments onto image by dense sampling"""
+    height, width = img.shape[:2]
+    n = int(np.ceil(np.nanmax(np.hypot(x1 - x0, y1 - y0), initial=1))) + 1
+    t = np.linspace(0, 1, n)[None, :]
+    px = np.floor(x0[:, None] + (x1 - x0)[:, None] * t).astype(np.int64).ravel()
+    py = np.floor(y0[:, None] + (y1 - y0)[:, None] * t).astype(np.int64).ravel()
+    inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+    img[py[inside], px[inside]] = color
+
+
+def draw_arrows(img, x, y, u, v, length, color=(0, 0, 0, 255)):
+    """Draw arrows centered at pixel positions given, pointing to (u, v)"""
+    ang = np.arctan2(-v, u) # image y axis goes down
+    dx, dy = np.cos(ang) * length / 2, np.sin(ang) * length / 2
+    tail_x, tail_y = x - dx, y - dy
+    head_x, head_y = x + dx, y + dy
+    _draw_lines(img, tail_x, tail_y, head_x, head_y, color)
+    for side in (-1, 1):
+        hang = ang + np.pi + side * np.deg2rad(30)
+        _draw_lines(
+            img,
+            head_x,
+            head_y,
+            head_x + np.cos(hang) * length / 3,
+            head_y + np.sin(hang) * length / 3,
+            color,
+        )
+
+
+def rasterize_pixels(x, y, wind_speed, width, height, colormap="wind",
+                     wind_dir=None, arrow_spacing=None,
+                     background=(255, 255, 255, 255), radius=None,
+                     origin=(0, 0)):
+    """Rasterize wind speed of cells at pixel coordinates x/y.
+
+    `radius` is the splat radius in pixels, estimated from the cell spacing
+    if not given. `origin` is the offset of the image in a larger pixel
+    grid (e.g. map tiles), arrows are aligned to that grid.
+    """
+    img = np.empty((height, width, 4), dtype=np.uint8)
+    img[:] = background
+
+    lut, vmin, vmax = lookup_table(colormap)
+
+    if radius is None:
+        radius = min(max(_cell_spacing(x, y) * 0.75, 1.), MAX_SPLAT_RADIUS)
+
+    spd = np.ma.getdata(wind_speed).astype(np.float64)
+    valid = (
+        ~np.ma.getmaskarray(wind_speed)
+        & np.isfinite(spd)
+        & np.isfinite(x)
+        & np.isfinite(y)
+        & (x >= -radius) & (x < width + radius)
+        & (y >= -radius) & (y < height + radius)
+    )
+    if not valid.any():
+        return img
+
+    x, y, spd = x[valid], y[valid], spd[valid]
+    idx = np.clip((spd - vmin) / (vmax - vmin) * (len(lut) - 1), 0, len(lut) - 1)
+    _splat(img, x, y, lut[idx.astype(np.intp)], radius)
+
+    if wind_dir is not None and arrow_spacing:
+        u = np.ma.getdata(wind_dir['v'])[valid]
+        v = np.ma.getdata(wind_dir['h'])[valid]
+        first = thin_cells(x + origin[0], y + origin[1], arrow_spacing)
+        draw_arrows(img, x[first], y[first], u[first], v[first], arrow_spacing * 0.8)
+
+    return img
+
+
+def thin_cells(x, y, spacing):
+    """Indices of the first cell in each block of `spacing` pixels"""
+    blocks = np.stack(
+        [np.floor(x / spacing), np.floor(y / spacing)], axis=-1
+    ).astype(np.int64)
+    _, first = np.unique(blocks, axis=0, return_index=True)
+    return np.sort(first)
+
+
+def rasterize(lons, lats, wind_speed, georange, width=1200, height=None,
+              colormap="wind", wind_dir=None, arrow_spacing=None,
+              background=(255, 255, 255, 255)):
+    """Rasterize wind speed of swath cells onto pixel grid of georange.
+
+    Returns RGBA uint8 image array. If ``wind_dir`` and ``arrow_spacing``
+    (in pixels) are given, sparse arrows are drawn over the image.
+    """
+    latmin, latmax, lonmin, lonmax = georange
+    if height is None:
+        height = int(round(width * (latmax - latmin) / (lonmax - lonmin)))
+    x, y = lonlat_to_pixel(lons, lats, georange, width, height)
+    return rasterize_pixels(
+        x,
+        y,
+        wind_speed,
+        width,
+        height,
+        colormap=colormap,
+        wind_dir=wind_dir,
+        arrow_spacing=arrow_spacing,
+        background=background,
+    )
+
+
+def save_png(img, save_file):
+    plt.imsave(save_file, img)
+
+
+def render_preview(reader, georange, save_file, width=1200,
+                   colormap="wind", arrow_spacing=None):
+    """Rasterize a loaded reader and write it as PNG"""
+    lons, lats = reader.get_lonlats()
+    wind_speed, wind_dir = reader.get_values()
+    img = rasterize(
+        lons,
+        lats,
+        wind_speed,
+        georange,
+        width=width,
+        colormap=colormap,
+        wind_dir=wind_dir,
+        arrow_spacing=arrow_spacing,
+    )
+    save_png(img, save_file)
+    return img
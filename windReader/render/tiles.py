@@ -0,0 +1,289 @@
+"""Web-Mercator XYZ tiles of swath winds with an on-disk tile cache"""
+
+import io
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import matplotlib.image as mimage
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import Normalize
+from matplotlib.figure import Figure
+
+from windReader.colormap import colormap as cm
+from windReader.reader import load_reader
+from windReader.reader.utils import granule_key
+from windReader.render.barbs import barbs
+from windReader.render.cache import ImageCache, content_key
+from windReader.render.raster import (
+    MAX_SPLAT_RADIUS, _cell_spacing, rasterize_pixels, thin_cells
+)
+
+TILE_SIZE = 256
+MAX_LATITUDE = 85.05112878
+TRANSPARENT = (0, 0, 0, 0)
+# cells farther than this from a tile (in pixels) can not touch it
+TILE_MARGIN = 32
+
+
+def lonlat_to_global_pixel(lons, lats, zoom):
+    """Web-Mercator pixel coordinates at zoom level given"""
+    n = TILE_SIZE * 2**zoom
+    lons = (np.asarray(lons, dtype=np.float64) + 180) % 360 - 180
+    lats = np.clip(np.asarray(lats, dtype=np.float64), -MAX_LATITUDE, MAX_LATITUDE)
+    s = np.sin(np.deg2rad(lats))
+    x = (lons + 180) / 360 * n
+    y = (0.5 - np.log((1 + s) / (1 - s)) / (4 * np.pi)) * n
+    return x, y
+
+
+def tile_georange(zoom, x, y):
+    """(latmin, latmax, lonmin, lonmax) of a tile"""
+    n = 2**zoom
+    lonmin, lonmax = x / n * 360 - 180, (x + 1) / n * 360 - 180
+    latmax = np.rad2deg(np.arctan(np.sinh(np.pi * (1 - 2 * y / n))))
+    latmin = np.rad2deg(np.arctan(np.sinh(np.pi * (1 - 2 * (y + 1) / n))))
+    return latmin, latmax, lonmin, lonmax
+
+
+class SwathTiles(object):
+    """Valid swath cells prepared for tiling.
+
+    Cells are bucketed by the tile they fall in per zoom level, so a tile
+    only looks at the cells of itself and its 8 neighbours.
+    """
+
+    def __init__(self, lons, lats, wind_speed, wind_dir, key=None):
+        valid = ~np.ma.getmaskarray(wind_speed) & np.isfinite(np.ma.getdata(wind_speed))
+        # cell spacing at zoom 0, estimated on the 2-D swath grid
+        gx, gy = lonlat_to_global_pixel(np.ma.getdata(lons), np.ma.getdata(lats), 0)
+        self.spacing = _cell_spacing(gx, gy)
+        self.lons = np.ma.getdata(lons)[valid].astype(np.float64)
+        self.lats = np.ma.getdata(lats)[valid].astype(np.float64)
+        self.speed = np.ma.getdata(wind_speed)[valid].astype(np.float64)
+        self.u = np.ma.getdata(wind_dir['v'])[valid].astype(np.float64)
+        self.v = np.ma.getdata(wind_dir['h'])[valid].astype(np.float64)
+        self.key = key
+        self._buckets = {}
+
+    @classmethod
+    def from_reader(cls, reader, key=None):
+        lons, lats = reader.get_lonlats()
+        wind_speed, wind_dir = reader.get_values()
+        return cls(lons, lats, wind_speed, wind_dir, key=key)
+
+    @classmethod
+    def from_file(cls, fname, reader=None, band=None, qc=True):
+        with load_reader(fname, reader=reader, band=band, qc=qc) as reader_:
+            return cls.from_reader(reader_, key=granule_key(fname, band, qc))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_buckets"] = {}
+        return state
+
+    def _zoom_index(self, zoom):
+        if zoom not in self._buckets:
+            x, y = lonlat_to_global_pixel(self.lons, self.lats, zoom)
+            tx = np.floor(x / TILE_SIZE).astype(np.int64)
+            ty = np.floor(y / TILE_SIZE).astype(np.int64)
+            tile_id = ty * 2**zoom + tx
+            order = np.argsort(tile_id, kind="stable")
+            ids, start = np.unique(tile_id[order], return_index=True)
+            end = np.append(start[1:], len(order))
+            buckets = {
+                int(i): order[s:e] for i, s, e in zip(ids, start, end)
+            }
+            self._buckets[zoom] = (x, y, buckets)
+        return self._buckets[zoom]
+
+    def tiles(self, zoom, margin=TILE_MARGIN):
+        """Tiles (x, y) touched by any valid cell at zoom level given"""
+        n = 2**zoom
+        x, y, _ = self._zoom_index(zoom)
+        found = []
+        for dx in (-margin, 0, margin):
+            for dy in (-margin, 0, margin):
+                tx = np.floor((x + dx) / TILE_SIZE).astype(np.int64) % n
+                ty = np.floor((y + dy) / TILE_SIZE).astype(np.int64)
+                keep = (ty >= 0) & (ty < n)
+                found.append(ty[keep] * n + tx[keep])
+        if not found:
+            return []
+        ids = np.unique(np.concatenate(found))
+        return [(int(i % n), int(i // n)) for i in ids]
+
+    def cells(self, zoom, x, y):
+        """Indices and global pixel coordinates of cells near a tile"""
+        n = 2**zoom
+        gx, gy, buckets = self._zoom_index(zoom)
+        idx = [
+            buckets[(y + dy) * n + (x + dx) % n]
+            for dx in (-1, 0, 1)
+            for dy in (-1, 0, 1)
+            if 0 <= y + dy < n and (y + dy) * n + (x + dx) % n in buckets
+        ]
+        if not idx:
+            idx = np.empty(0, dtype=np.intp)
+        else:
+            idx = np.concatenate(idx)
+        px, py = gx[idx] - x * TILE_SIZE, gy[idx] - y * TILE_SIZE
+        # cells wrapped around the antimeridian
+        px[px > n * TILE_SIZE / 2] -= n * TILE_SIZE
+        px[px < -n * TILE_SIZE / 2] += n * TILE_SIZE
+        return idx, px, py
+
+
+@lru_cache(maxsize=8)
+def _get_colormap(name):
+    return cm.get_colormap(name)
+
+
+class _BarbCanvas(object):
+    """Reusable transparent figure of one tile for drawing barbs"""
+
+    def __init__(self, dpi=100):
+        self.dpi = dpi
+        self.fig = Figure(figsize=(TILE_SIZE / dpi, TILE_SIZE / dpi), dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.fig.patch.set_alpha(0)
+        self.ax = self.fig.add_axes([0, 0, 1, 1])
+        self.ax.set_axis_off()
+        self.ax.set_xlim(0, TILE_SIZE)
+        self.ax.set_ylim(TILE_SIZE, 0)
+
+    def render(self, px, py, u, v, speed, flip, colormap, barb_spacing):
+        cmap, vmin, vmax = _get_colormap(colormap)
+        # staff length in pixels is length**2 / 2 * dpi / 72
+        length = np.sqrt(2 * 0.8 * barb_spacing * 72 / self.dpi)
+        collection = barbs(
+            self.ax,
+            px,
+            py,
+            u,
+            v,
+            speed,
+            cmap=cmap,
+            norm=Normalize(vmin=vmin, vmax=vmax),
+            flip_barb=flip,
+            pivot='middle',
+            length=length,
+            linewidth=0.83 * 72 / self.dpi,
+            transform=self.ax.transData,
+        )
+        self.canvas.draw()
+        img = np.asarray(self.canvas.buffer_rgba()).copy()
+        collection.remove()
+        return img
+
+
+_barb_canvas = None
+
+
+def render_tile(swath, zoom, x, y, mode="raster", colormap="wind",
+                barb_spacing=24, arrow_spacing=None):
+    """Render tile z/x/y of a swath as RGBA array, `None` if it is empty"""
+    global _barb_canvas
+    idx, px, py = swath.cells(zoom, x, y)
+    inside = (
+        (px >= -TILE_MARGIN) & (px < TILE_SIZE + TILE_MARGIN)
+        & (py >= -TILE_MARGIN) & (py < TILE_SIZE + TILE_MARGIN)
+    )
+    idx, px, py = idx[inside], px[inside], py[inside]
+    if not len(idx):
+        return None
+
+    if mode == "raster":
+        radius = min(max(swath.spacing * 2**zoom * 0.75, 1.), MAX_SPLAT_RADIUS)
+        return rasterize_pixels(
+            px,
+            py,
+            swath.speed[idx],
+            TILE_SIZE,
+            TILE_SIZE,
+            colormap=colormap,
+            wind_dir={'v': swath.u[idx], 'h': swath.v[idx]},
+            arrow_spacing=arrow_spacing,
+            background=TRANSPARENT,
+            radius=radius,
+            origin=(x * TILE_SIZE, y * TILE_SIZE),
+        )
+    elif mode == "barbs":
+        # thinning is aligned to the global pixel grid, so tiles are seamless
+        keep = thin_cells(px + x * TILE_SIZE, py + y * TILE_SIZE, barb_spacing)
+        idx, px, py = idx[keep], px[keep], py[keep]
+        if _barb_canvas is None:
+            _barb_canvas = _BarbCanvas()
+        return _barb_canvas.render(
+            px,
+            py,
+            swath.u[idx],
+            swath.v[idx],
+            swath.speed[idx],
+            swath.lats[idx] <= 0,
+            colormap,
+            barb_spacing,
+        )
+    else:
+        raise ValueError(f"Tile mode {mode} not supported.")
+
+
+def encode_png(img):
+    buf = io.BytesIO()
+    mimage.imsave(buf, img, format="png")
+    return buf.getvalue()
+
+
+class TileCache(ImageCache):
+    """Content-addressed tile cache.
+
+    A tile is stored under the hash of everything that determines its
+    content: the granule identity (path, mtime, size, band, qc), the tile
+    index and the rendering parameters. Tiles without data are stored as
+    empty files, `get` returns `b""` for them.
+    """
+
+    @staticmethod
+    def key(granule, zoom, x, y, params):
+        return content_key({"granule": granule, "tile": [zoom, x, y], "params": params})
+
+
+_worker_swath = None
+
+
+def _init_worker(swath):
+    global _worker_swath
+    _worker_swath = swath
+
+
+def _render_job(args):
+    cache_dir, zoom, x, y, params = args
+    cache = TileCache(cache_dir)
+    key = cache.key(_worker_swath.key, zoom, x, y, params)
+    img = render_tile(_worker_swath, zoom, x, y, **params)
+    # empty tiles are cached too, so they are not rendered again
+    cache.put(key, b"" if img is None else encode_png(img))
+    return zoom, x, y, img is not None
+
+
+def pregenerate(swath, zooms, cache_dir, workers=None, **params):
+    """Render all tiles of the swath footprint for the zoom levels given
+    in parallel, skipping tiles already cached. Returns number rendered."""
+    cache = TileCache(cache_dir)
+    jobs = [
+        (cache_dir, zoom, x, y, params)
+        for zoom in zooms
+        for x, y in swath.tiles(zoom)
+        if not cache.exists(cache.key(swath.key, zoom, x, y, params))
+    ]
+    if not jobs:
+        return 0
+    if workers == 1:
+        _init_worker(swath)
+        results = list(map(_render_job, jobs))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(swath,)
+        ) as executor:
+            results = list(executor.map(_render_job, jobs, chunksize=16))
+    return sum(1 for *_, rendered in results if rendered)